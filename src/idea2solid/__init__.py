@@ -2,16 +2,51 @@
 
 from .snippet_loader import load_snippet_corpus
 from .vector_store import SnippetVectorStore
+from .embedding_cache import CachedEmbeddings
+from .embeddings import HashedNgramEmbeddings, create_embeddings, register_embedding_backend
+from .snippet_watcher import SnippetDirectoryWatcher
+from .context_packer import count_tokens, pack_context
 from .retrieval_graph import build_retrieval_graph
 from .pipeline import build_generation_pipeline, DEFAULT_MODEL
+from .artifacts import ArtifactStore
+from .mesh import mesh_stats, read_stl
+from .scad_lint import lint_scad
+from .openscad_caps import OpenScadCapabilities, probe_openscad
+from .render_cache import RenderCache
+from .response_cache import SemanticResponseCache
+from .single_flight import SingleFlight, request_key
+from .jobs import JobQueue, QueueFullError
+from .render_pool import RenderLimits, RenderPool, get_default_render_pool
 from .tracing import build_run_config, langsmith_enabled
 
 __all__ = [
     "load_snippet_corpus",
     "SnippetVectorStore",
+    "SnippetDirectoryWatcher",
+    "CachedEmbeddings",
+    "HashedNgramEmbeddings",
+    "create_embeddings",
+    "register_embedding_backend",
+    "count_tokens",
+    "pack_context",
     "build_retrieval_graph",
     "build_generation_pipeline",
     "DEFAULT_MODEL",
+    "RenderPool",
+    "RenderLimits",
+    "lint_scad",
+    "mesh_stats",
+    "read_stl",
+    "OpenScadCapabilities",
+    "probe_openscad",
+    "RenderCache",
+    "ArtifactStore",
+    "SemanticResponseCache",
+    "SingleFlight",
+    "request_key",
+    "JobQueue",
+    "QueueFullError",
+    "get_default_render_pool",
     "build_run_config",
     "langsmith_enabled",
 ]
@@ -0,0 +1,128 @@
+"""Immutable, content-addressed STL artifacts with precompressed siblings."""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+import re
+import shutil
+import threading
+from importlib import import_module
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ARTIFACT_NAME_RE = re.compile(r"^(?P<sha>[0-9a-f]{64})\.stl$")
+
+# Content-Encoding token -> file suffix, in server preference order.
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+
+def default_artifact_bytes() -> int:
+    """Size budget from `IDEA2SOLID_ARTIFACT_CACHE_MB` (default 1024 MB)."""
+
+    return int(float(os.getenv("IDEA2SOLID_ARTIFACT_CACHE_MB", "1024")) * 1024 * 1024)
+
+
+def _brotli() -> Any:
+    try:
+        return import_module("brotli")
+    except ModuleNotFoundError:
+        return None
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """Publish STL files under `<sha256>.stl`, compressed once at publish time.
+
+    A published artifact never changes, so it can be served with a strong
+    ETag and `Cache-Control: immutable`. `.gz` (and `.br` when the `brotli`
+    package is installed) siblings are written only if they are smaller than
+    the original, at moderate levels that keep publishing fast. Artifacts
+    beyond `max_bytes` are evicted least recently published or served first,
+    together with their siblings. `publish` hashes and compresses the whole
+    file, so async callers should run it in a worker thread.
+    """
+
+    def __init__(self, directory: str | Path, *, max_bytes: Optional[int] = None) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = default_artifact_bytes() if max_bytes is None else max_bytes
+        self._lock = threading.Lock()
+
+    def path_for(self, sha: str, encoding: Optional[str] = None) -> Path:
+        return self.directory / f"{sha}.stl{ENCODINGS[encoding] if encoding else ''}"
+
+    def encodings(self, sha: str) -> List[str]:
+        return [encoding for encoding in ENCODINGS if self.path_for(sha, encoding).exists()]
+
+    def publish(self, stl_path: str | Path) -> Dict[str, Any]:
+        """Make `stl_path` available by content hash; idempotent per content."""
+        source = Path(stl_path)
+        sha = _file_sha256(source)
+        target = self.path_for(sha)
+        with self._lock:
+            if target.exists():
+                os.utime(target)
+            else:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                partial = target.with_name(f"{target.name}.partial")
+                try:
+                    os.link(source, partial)
+                except OSError:
+                    shutil.copyfile(source, partial)
+                self._write_compressed(partial.read_bytes(), sha)
+                os.replace(partial, target)
+        self.evict(keep=sha)
+        return {"sha256": sha, "bytes": target.stat().st_size, "encodings": self.encodings(sha)}
+
+    def _write_compressed(self, data: bytes, sha: str) -> None:
+        compressors = {"gzip": lambda payload: gzip.compress(payload, compresslevel=6, mtime=0)}
+        brotli = _brotli()
+        if brotli is not None:
+            compressors["br"] = lambda payload: brotli.compress(payload, quality=5)
+        for encoding, compress in compressors.items():
+            compressed = compress(data)
+            if len(compressed) < len(data):
+                path = self.path_for(sha, encoding)
+                partial = path.with_name(f"{path.name}.partial")
+                partial.write_bytes(compressed)
+                os.replace(partial, path)
+
+    def touch(self, sha: str) -> None:
+        try:
+            os.utime(self.path_for(sha))
+        except FileNotFoundError:
+            pass
+
+    def evict(self, *, keep: Optional[str] = None) -> None:
+        groups: Dict[str, List[Any]] = {}
+        for path in self.directory.glob("*.stl*"):
+            match = re.match(r"^([0-9a-f]{64})\.stl", path.name)
+            if match is None or path.name.endswith(".partial"):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entry = groups.setdefault(match.group(1), [0.0, 0])
+            if path.suffix == ".stl":
+                entry[0] = stat.st_mtime
+            entry[1] += stat.st_size
+        total = sum(size for _, size in groups.values())
+        if total <= self.max_bytes:
+            return
+        for sha, (_, size) in sorted(groups.items(), key=lambda item: item[1][0]):
+            if total <= self.max_bytes:
+                break
+            if sha == keep:
+                continue
+            for encoding in (None, *ENCODINGS):
+                self.path_for(sha, encoding).unlink(missing_ok=True)
+            total -= size
@@ -0,0 +1,333 @@
+"""Offline benchmark harness for the generation pipeline.
+
+Everything external is replaced by a local stand-in: a stub chat model that
+replays recorded or corpus scripts after a fixed latency, the `hashed`
+embeddings backend, and a scriptable fake OpenSCAD binary with configurable
+render and check delays. What remains is the pipeline's own overhead —
+graph execution, retrieval, context packing, linting, process spawning,
+caching and STL handling — which is what a performance regression shows up in.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import resource
+import stat
+import struct
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from importlib import import_module
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .pipeline import build_generation_pipeline
+from .render_pool import RenderPool, _percentile
+from .snippet_loader import load_snippet_corpus
+from .vector_store import SnippetVectorStore
+
+# Metrics where a larger value is better; every other metric is a cost.
+_HIGHER_IS_BETTER = ("throughput_rps",)
+
+
+class StubChatModel:
+    """Chat model stand-in that cycles through canned OpenSCAD responses."""
+
+    def __init__(self, responses: Sequence[str], *, latency: float = 0.05) -> None:
+        if not responses:
+            raise ValueError("StubChatModel needs at least one response.")
+        self.latency = latency
+        self.calls = 0
+        self._responses = itertools.cycle(responses)
+        self._lock = threading.Lock()
+
+    def _next(self) -> Any:
+        with self._lock:
+            self.calls += 1
+            content = next(self._responses)
+        message_cls = getattr(import_module("langchain_core.messages"), "AIMessage")
+        return message_cls(content=content)
+
+    def invoke(self, messages: Any, config: Any = None, **kwargs: Any) -> Any:
+        time.sleep(self.latency)
+        return self._next()
+
+    async def ainvoke(self, messages: Any, config: Any = None, **kwargs: Any) -> Any:
+        await asyncio.sleep(self.latency)
+        return self._next()
+
+
+def _cube_stl(size: float = 10.0) -> bytes:
+    corners = [(x, y, z) for x in (0.0, size) for y in (0.0, size) for z in (0.0, size)]
+    faces = [
+        (0, 2, 6), (0, 6, 4), (1, 5, 7), (1, 7, 3), (0, 4, 5), (0, 5, 1),
+        (2, 3, 7), (2, 7, 6), (0, 1, 3), (0, 3, 2), (4, 6, 7), (4, 7, 5),
+    ]
+    body = bytearray(b"idea2solid benchmark cube".ljust(80, b"\0"))
+    body += struct.pack("<I", len(faces))
+    for face in faces:
+        body += struct.pack("<3f", 0.0, 0.0, 0.0)
+        for corner in face:
+            body += struct.pack("<3f", *corners[corner])
+        body += struct.pack("<H", 0)
+    return bytes(body)
+
+
+_FAKE_OPENSCAD = '''#!{python}
+"""Fake OpenSCAD for benchmarks: sleeps, then writes a fixed binary STL."""
+import os, sys, time
+
+args = sys.argv[1:]
+if "--version" in args:
+    sys.stderr.write("OpenSCAD version 2021.01 (idea2solid benchmark fake)\\n")
+    sys.exit(0)
+if "--help" in args:
+    sys.stderr.write("  -o [ --o ] arg  the file extension specifies the type: stl, off, amf, csg, dxf, svg, echo, ast\\n")
+    sys.exit(1)
+
+output = args[args.index("-o") + 1] if "-o" in args else None
+with open(args[-1]) as handle:
+    code = handle.read()
+render = output is not None and output.endswith(".stl")
+delay = float(os.environ.get("IDEA2SOLID_FAKE_RENDER_DELAY" if render else "IDEA2SOLID_FAKE_CHECK_DELAY", {defaults}[render]))
+time.sleep(delay)
+if {fail_marker!r} in code:
+    sys.stderr.write("ERROR: Parser error: benchmark failure marker\\n")
+    sys.exit(1)
+if output:
+    with open(output, "wb") as handle:
+        handle.write({stl!r} if render else b"group();\\n")
+'''
+
+
+def write_fake_openscad(
+    directory: str | Path,
+    *,
+    render_delay: float = 0.2,
+    check_delay: float = 0.05,
+    fail_marker: str = "BENCHMARK_FAIL",
+) -> Path:
+    """Write an executable fake `openscad` into `directory` and return its path.
+
+    Renders (`-o *.stl`) sleep `render_delay` and write a 10 mm binary STL
+    cube; other runs sleep `check_delay`. Scripts containing `fail_marker`
+    fail with an OpenSCAD-style error. The delays can be overridden per run
+    with `IDEA2SOLID_FAKE_RENDER_DELAY` / `IDEA2SOLID_FAKE_CHECK_DELAY`.
+    """
+
+    path = Path(directory) / "openscad"
+    path.write_text(
+        _FAKE_OPENSCAD.format(
+            python=sys.executable,
+            defaults=(str(check_delay), str(render_delay)),
+            fail_marker=fail_marker,
+            stl=_cube_stl(),
+        )
+    )
+    path.chmod(path.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
+
+
+@dataclass
+class BenchmarkSettings:
+    requests: int = 24
+    concurrency: Sequence[int] = (1, 4, 8)
+    llm_latency: float = 0.05
+    render_delay: float = 0.2
+    check_delay: float = 0.05
+    compile_mode: str = "fused"
+    top_k: int = 4
+    memory_requests: int = 8
+    responses: Optional[Sequence[str]] = None
+    pipeline_options: Dict[str, Any] = field(default_factory=dict)
+
+
+def _corpus_prompts(snippet_dir: Path) -> List[str]:
+    return [f"{record.title}: {record.summary}" for record in load_snippet_corpus(snippet_dir)]
+
+
+def _corpus_responses(snippet_dir: Path) -> List[str]:
+    return [record.code for record in load_snippet_corpus(snippet_dir)]
+
+
+def _summarize(samples: Sequence[float]) -> Dict[str, float]:
+    return {
+        "count": len(samples),
+        "p50_ms": round(_percentile(samples, 0.5) * 1000, 2),
+        "p95_ms": round(_percentile(samples, 0.95) * 1000, 2),
+        "max_ms": round(max(samples, default=0.0) * 1000, 2),
+    }
+
+
+def _timed_run(pipeline: Any, question: str, node_samples: Dict[str, List[float]], lock: threading.Lock) -> float:
+    """Stream one request, attributing the time between updates to each node."""
+
+    started = previous = time.perf_counter()
+    for update in pipeline.stream({"question": question}, stream_mode="updates"):
+        now = time.perf_counter()
+        with lock:
+            for node in update:
+                node_samples.setdefault(node, []).append(now - previous)
+        previous = now
+    return time.perf_counter() - started
+
+
+def _run_level(
+    vector_store: SnippetVectorStore,
+    openscad: Path,
+    output_dir: Path,
+    settings: BenchmarkSettings,
+    responses: List[str],
+    questions: Sequence[str],
+    concurrency: int,
+    node_samples: Dict[str, List[float]],
+) -> Tuple[List[float], float]:
+    pipeline = build_generation_pipeline(
+        vector_store,
+        top_k=settings.top_k,
+        llm=StubChatModel(responses, latency=settings.llm_latency),
+        openscad_path=str(openscad),
+        output_dir=output_dir,
+        compile_mode=settings.compile_mode,
+        render_pool=RenderPool(max_workers=concurrency),
+        render_cache=False,
+        **settings.pipeline_options,
+    )
+    lock = threading.Lock()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        durations = list(executor.map(lambda question: _timed_run(pipeline, question, node_samples, lock), questions))
+    return durations, time.perf_counter() - started
+
+
+def run_benchmark(snippet_dir: str | Path, settings: Optional[BenchmarkSettings] = None) -> Dict[str, Any]:
+    """Run the offline benchmark and return a JSON-serializable report.
+
+    Latency and throughput come from untraced runs; allocations are traced
+    in a separate, smaller pass so tracing overhead never skews the timings.
+    """
+
+    settings = settings or BenchmarkSettings()
+    snippet_dir = Path(snippet_dir)
+    prompts = _corpus_prompts(snippet_dir)
+    responses = list(settings.responses or _corpus_responses(snippet_dir))
+    questions = [f"{prompts[index % len(prompts)]} (variant {index})" for index in range(settings.requests)]
+
+    with tempfile.TemporaryDirectory(prefix="idea2solid-bench-") as scratch:
+        scratch_dir = Path(scratch)
+        openscad = write_fake_openscad(
+            scratch_dir, render_delay=settings.render_delay, check_delay=settings.check_delay
+        )
+        vector_store = SnippetVectorStore.from_snippet_dir(
+            snippet_dir, embeddings_backend="hashed", persist=False, cache_embeddings=False
+        )
+
+        report: Dict[str, Any] = {
+            "settings": {
+                "requests": settings.requests,
+                "concurrency": list(settings.concurrency),
+                "llm_latency": settings.llm_latency,
+                "render_delay": settings.render_delay,
+                "check_delay": settings.check_delay,
+                "compile_mode": settings.compile_mode,
+                "top_k": settings.top_k,
+                "memory_requests": settings.memory_requests,
+            },
+            "throughput": {},
+        }
+        node_samples: Dict[str, List[float]] = {}
+        end_to_end: List[float] = []
+        for level in settings.concurrency:
+            durations, elapsed = _run_level(
+                vector_store, openscad, scratch_dir / f"outputs-{level}", settings, responses,
+                questions, level, node_samples,
+            )
+            end_to_end.extend(durations)
+            report["throughput"][str(level)] = {
+                "throughput_rps": round(len(questions) / elapsed, 3),
+                **_summarize(durations),
+            }
+
+        traced_peak = 0
+        if settings.memory_requests > 0:
+            tracemalloc.start()
+            try:
+                _run_level(
+                    vector_store, openscad, scratch_dir / "outputs-memory", settings, responses,
+                    questions[: settings.memory_requests], max(settings.concurrency, default=1), {},
+                )
+                _, traced_peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+    # ru_maxrss is in KiB on Linux and bytes on macOS.
+    rss_unit = 1 if sys.platform == "darwin" else 1024
+    report["nodes"] = {node: _summarize(samples) for node, samples in sorted(node_samples.items())}
+    report["end_to_end"] = _summarize(end_to_end)
+    report["memory"] = {
+        "traced_peak_mb": round(traced_peak / 1024 / 1024, 2),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * rss_unit / 1024 / 1024, 2),
+        "children_max_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * rss_unit / 1024 / 1024, 2
+        ),
+    }
+    return report
+
+
+def _flatten(report: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat: Dict[str, float] = {}
+    for key, value in report.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def compare_to_baseline(
+    report: Dict[str, Any],
+    baseline: Dict[str, Any],
+    *,
+    threshold: float = 0.2,
+    min_delta_ms: float = 5.0,
+) -> List[str]:
+    """List metrics that regressed by more than `threshold` (relative).
+
+    Latency and memory regress when they grow and throughput when it shrinks.
+    Latency changes smaller than `min_delta_ms` are treated as noise. Only
+    `nodes`, `end_to_end`, `throughput` and `memory` are compared, and only
+    metrics present in both reports.
+    """
+
+    regressions: List[str] = []
+    sections = ("nodes", "end_to_end", "throughput", "memory")
+    current = _flatten({key: report.get(key, {}) for key in sections})
+    previous = _flatten({key: baseline.get(key, {}) for key in sections})
+    for name, before in sorted(previous.items()):
+        after = current.get(name)
+        if after is None or name.endswith(".count") or before <= 0:
+            continue
+        if name.endswith(_HIGHER_IS_BETTER):
+            regressed = after < before * (1.0 - threshold)
+        else:
+            regressed = after > before * (1.0 + threshold)
+            if name.endswith("_ms") and after - before < min_delta_ms:
+                regressed = False
+        if regressed:
+            change = (after - before) / before * 100
+            regressions.append(f"{name}: {before:g} -> {after:g} ({change:+.1f}%)")
+    return regressions
+
+
+def load_baseline(path: str | Path) -> Optional[Dict[str, Any]]:
+    path = Path(path)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
@@ -0,0 +1,199 @@
+"""Fit retrieved snippets into a token budget for the synthesis prompt."""
+
+from __future__ import annotations
+
+import math
+import os
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from importlib import import_module
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence
+
+from .lexical_index import tokenize
+
+
+def default_context_budget() -> int:
+    """Token budget from `IDEA2SOLID_CONTEXT_TOKENS` (default 3000, 0 disables)."""
+
+    return int(os.getenv("IDEA2SOLID_CONTEXT_TOKENS", "3000"))
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: Optional[str]) -> Any:
+    try:
+        tiktoken = import_module("tiktoken")
+    except ModuleNotFoundError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding("cl100k_base")
+    except (KeyError, ValueError):
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Count tokens with tiktoken when installed, else ~4 characters per token."""
+
+    encoding = _encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / 4)
+    return len(encoding.encode(text))
+
+
+_ASSIGNMENT_RE = re.compile(r"^\s*([A-Za-z_$][A-Za-z0-9_]*)\s*=")
+
+
+def trim_code(code: str, *, parameters: Sequence[str] = (), max_comment_chars: int = 80) -> str:
+    """Drop low-value comments from OpenSCAD source without touching strings.
+
+    Block comments and line comments longer than `max_comment_chars` are
+    removed, as are trailing comments on assignments to `parameters`, which
+    the snippet's parameter list already describes. Runs of blank lines are
+    collapsed.
+    """
+
+    known = set(parameters)
+    lines: List[str] = []
+    current: List[str] = []
+    position = 0
+    in_string = False
+    length = len(code)
+    while position < length:
+        char = code[position]
+        if in_string:
+            current.append(char)
+            if char == "\\" and position + 1 < length:
+                current.append(code[position + 1])
+                position += 1
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+            current.append(char)
+        elif code.startswith("/*", position):
+            end = code.find("*/", position + 2)
+            position = length if end == -1 else end + 2
+            continue
+        elif code.startswith("//", position):
+            end = code.find("\n", position)
+            end = length if end == -1 else end
+            comment = code[position:end]
+            match = _ASSIGNMENT_RE.match("".join(current))
+            redundant = match is not None and match.group(1) in known
+            if len(comment) <= max_comment_chars and not redundant:
+                current.append(comment)
+            position = end
+            continue
+        elif char == "\n":
+            lines.append("".join(current).rstrip())
+            current = []
+        else:
+            current.append(char)
+        position += 1
+    lines.append("".join(current).rstrip())
+
+    trimmed: List[str] = []
+    for line in lines:
+        if not line and (not trimmed or not trimmed[-1]):
+            continue
+        trimmed.append(line)
+    return "\n".join(trimmed).strip()
+
+
+def format_snippet(snippet: Dict[str, Any], index: int, *, compact: bool = False) -> str:
+    """Render one snippet as a prompt block; `compact` omits the parameter list."""
+
+    lines = [
+        f"Snippet {index}: {snippet.get('title')}",
+        f"Score: {snippet.get('score', 0.0):.4f}",
+        f"Summary: {snippet.get('summary')}",
+    ]
+    if not compact:
+        lines.append("Parameters:")
+        lines.append(
+            "\n".join(f"- {name}: {desc}" for name, desc in (snippet.get("parameters") or {}).items())
+        )
+    lines.extend(["Code:", snippet.get("code", "")])
+    return "\n".join(lines)
+
+
+@dataclass
+class PackedContext:
+    context: str
+    selected: List[Dict[str, Any]]
+    dropped: List[Dict[str, Any]] = field(default_factory=list)
+    tokens: int = 0
+
+
+def _jaccard(left: FrozenSet[str], right: FrozenSet[str]) -> float:
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+def pack_context(
+    candidates: Sequence[Dict[str, Any]],
+    *,
+    max_snippets: int,
+    budget_tokens: int = 0,
+    diversity: float = 0.3,
+    model: Optional[str] = None,
+) -> PackedContext:
+    """Choose up to `max_snippets` candidates by maximal marginal relevance.
+
+    `candidates` are in retrieval order, which defines relevance (scores are
+    not comparable across retrieval modes). Each step picks the candidate
+    maximising `(1 - diversity) * relevance - diversity * similarity`, where
+    similarity is the token Jaccard overlap with snippets already chosen.
+    A chosen snippet whose block exceeds the remaining `budget_tokens` is
+    retried without its parameter list and otherwise dropped. Dropped
+    snippets are reported with the reason.
+    """
+
+    count = len(candidates)
+    relevance = [1.0 - rank / count for rank in range(count)] if count else []
+    token_sets = [frozenset(tokenize(f"{item.get('title', '')} {item.get('code', '')}")) for item in candidates]
+    remaining = list(range(count))
+    chosen: List[int] = []
+    selected: List[Dict[str, Any]] = []
+    dropped: List[Dict[str, Any]] = []
+    blocks: List[str] = []
+    used = 0
+
+    while remaining and len(selected) < max_snippets:
+        def marginal(position: int) -> float:
+            overlap = max((_jaccard(token_sets[position], token_sets[other]) for other in chosen), default=0.0)
+            return (1.0 - diversity) * relevance[position] - diversity * overlap
+
+        best = max(remaining, key=marginal)
+        remaining.remove(best)
+        snippet = dict(candidates[best])
+        snippet["code"] = trim_code(snippet.get("code", ""), parameters=list(snippet.get("parameters") or {}))
+        index = len(selected) + 1
+        block = format_snippet(snippet, index)
+        cost = count_tokens(block, model)
+        if budget_tokens and used + cost > budget_tokens:
+            block = format_snippet(snippet, index, compact=True)
+            cost = count_tokens(block, model)
+            if used + cost > budget_tokens:
+                dropped.append(_dropped(snippet, "budget", cost))
+                continue
+        chosen.append(best)
+        selected.append(snippet)
+        blocks.append(block)
+        used += cost
+
+    for position in remaining:
+        dropped.append(_dropped(candidates[position], "not_selected", None))
+
+    return PackedContext(context="\n\n".join(blocks), selected=selected, dropped=dropped, tokens=used)
+
+
+def _dropped(snippet: Dict[str, Any], reason: str, tokens: Optional[int]) -> Dict[str, Any]:
+    return {
+        "id": snippet.get("id"),
+        "title": snippet.get("title"),
+        "score": snippet.get("score"),
+        "reason": reason,
+        "tokens": tokens,
+    }
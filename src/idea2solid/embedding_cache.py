@@ -0,0 +1,180 @@
+"""Two-tier (memory LRU + SQLite) cache wrapped around an embeddings model."""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .embeddings import _EmbeddingsBase
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different prompts share a cache entry."""
+
+    return " ".join(text.split())
+
+
+class _DiskStore:
+    """SQLite key/value store for float32 vectors with size-based LRU eviction."""
+
+    def __init__(self, path: Path, max_bytes: int) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_accessed ON embeddings(accessed)")
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        if not keys:
+            return found
+        placeholders = ",".join("?" for _ in keys)
+        rows = self._conn.execute(
+            f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", list(keys)
+        ).fetchall()
+        for key, blob in rows:
+            vector = array("f")
+            vector.frombytes(blob)
+            found[key] = vector.tolist()
+        if found:
+            now = time.time()
+            self._conn.executemany(
+                "UPDATE embeddings SET accessed = ? WHERE key = ?", [(now, key) for key in found]
+            )
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]) -> None:
+        if not items:
+            return
+        now = time.time()
+        rows = []
+        for key, vector in items.items():
+            blob = array("f", vector).tobytes()
+            rows.append((key, blob, len(blob), now))
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (key, vector, size, accessed) VALUES (?, ?, ?, ?)", rows
+        )
+        self._evict()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        doomed: List[str] = []
+        for key, size in self._conn.execute("SELECT key, size FROM embeddings ORDER BY accessed ASC"):
+            if total <= target:
+                break
+            doomed.append(key)
+            total -= size
+        self._conn.executemany("DELETE FROM embeddings WHERE key = ?", [(key,) for key in doomed])
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class CachedEmbeddings(_EmbeddingsBase):
+    """Embeddings wrapper that consults a memory LRU, then a disk store.
+
+    Entries are keyed by model name, query/document kind and
+    whitespace-normalized text, so a repeated prompt or an unchanged snippet
+    never reaches the embedding API twice. Document misses are embedded in
+    one batched call to the wrapped model; query misses are too when the
+    model is `symmetric`, otherwise each goes through `embed_query`.
+    """
+
+    def __init__(
+        self,
+        inner: Any,
+        *,
+        model_name: str,
+        cache_path: Optional[str | Path] = None,
+        max_memory_entries: int = 2048,
+        max_disk_bytes: int = 256 * 1024 * 1024,
+        symmetric: bool = False,
+    ) -> None:
+        self.inner = inner
+        self.model_name = model_name
+        self.symmetric = symmetric
+        self.max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._disk = _DiskStore(Path(cache_path), max_disk_bytes) if cache_path else None
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def _key(self, text: str, kind: str) -> str:
+        payload = f"{self.model_name}\n{kind}\n{normalize_text(text)}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, texts: Sequence[str], kind: str) -> Tuple[List[str], Dict[str, List[float]]]:
+        keys = [self._key(text, kind) for text in texts]
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory and key not in found:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                    self._stats["memory_hits"] += 1
+            remaining = [key for key in dict.fromkeys(keys) if key not in found]
+            if remaining and self._disk is not None:
+                from_disk = self._disk.get_many(remaining)
+                for key, vector in from_disk.items():
+                    self._remember(key, vector)
+                    found[key] = vector
+                self._stats["disk_hits"] += len(from_disk)
+        return keys, found
+
+    def _embed_with(self, texts: Sequence[str], embed_batch: Any, kind: str) -> List[List[float]]:
+        keys, found = self._lookup(texts, kind)
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+
+        if missing:
+            vectors = embed_batch(list(missing.values()))
+            fresh = {key: list(vector) for key, vector in zip(missing, vectors)}
+            with self._lock:
+                self._stats["misses"] += len(fresh)
+                for key, vector in fresh.items():
+                    self._remember(key, vector)
+                if self._disk is not None:
+                    self._disk.put_many(fresh)
+            found.update(fresh)
+
+        return [found[key] for key in keys]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed_with(texts, self.inner.embed_documents, "document")
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_queries([text])[0]
+
+    def embed_queries(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embed several queries; symmetric models get every miss in a single request."""
+        if self.symmetric:
+            return self._embed_with(list(texts), self.inner.embed_documents, "query")
+        return self._embed_with(
+            list(texts), lambda batch: [self.inner.embed_query(text) for text in batch], "query"
+        )
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the current memory tier size."""
+        with self._lock:
+            return {**self._stats, "memory_entries": len(self._memory)}
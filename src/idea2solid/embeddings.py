@@ -0,0 +1,154 @@
+"""Pluggable embedding backends, including a deterministic offline one."""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import os
+import re
+from dataclasses import dataclass
+from importlib import import_module
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from langchain_core.embeddings import Embeddings as _EmbeddingsBase
+except ModuleNotFoundError:  # pragma: no cover - surfaced when the model is used
+    _EmbeddingsBase = object  # type: ignore[assignment,misc]
+
+
+DEFAULT_EMBEDDINGS_BACKEND = os.getenv("IDEA2SOLID_EMBEDDINGS", "openai")
+
+_WORD_RE = re.compile(r"[a-z0-9_]+")
+
+
+class HashedNgramEmbeddings(_EmbeddingsBase):
+    """Feature-hashed word and character n-gram vectors computed with NumPy.
+
+    Needs no network or model download and always maps the same text to the
+    same unit-length vector, which makes indexing reproducible and fast.
+    """
+
+    def __init__(self, dimensions: int = 384, char_ngram_sizes: Tuple[int, ...] = (3, 4)) -> None:
+        self.dimensions = dimensions
+        self.char_ngram_sizes = char_ngram_sizes
+
+    @property
+    def model_name(self) -> str:
+        sizes = "".join(str(size) for size in self.char_ngram_sizes)
+        return f"hashed-ngram-{self.dimensions}-c{sizes}"
+
+    def _features(self, text: str) -> Dict[str, float]:
+        counts: Dict[str, float] = {}
+        for word in _WORD_RE.findall(text.lower()):
+            counts[f"w:{word}"] = counts.get(f"w:{word}", 0.0) + 1.0
+            padded = f"<{word}>"
+            for size in self.char_ngram_sizes:
+                for start in range(max(len(padded) - size + 1, 0)):
+                    gram = f"c:{padded[start:start + size]}"
+                    counts[gram] = counts.get(gram, 0.0) + 0.5
+        # Sublinear term frequency keeps long code blocks from dominating.
+        return {feature: 1.0 + math.log(count) if count >= 1.0 else count for feature, count in counts.items()}
+
+    def _vector(self, text: str) -> List[float]:
+        numpy = import_module("numpy")
+        features = self._features(text)
+        if not features:
+            return [0.0] * self.dimensions
+        indices = []
+        weights = []
+        for feature, weight in features.items():
+            digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+            indices.append(digest % self.dimensions)
+            weights.append(weight if (digest >> 63) & 1 else -weight)
+        vector = numpy.bincount(
+            numpy.asarray(indices, dtype=numpy.int64),
+            weights=numpy.asarray(weights, dtype=numpy.float64),
+            minlength=self.dimensions,
+        )
+        norm = numpy.linalg.norm(vector)
+        if norm:
+            vector = vector / norm
+        return vector.astype(numpy.float32).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._vector(text)
+
+
+@dataclass(frozen=True)
+class EmbeddingBackend:
+    """Factory plus metadata for one embeddings implementation.
+
+    `symmetric` backends embed queries and documents identically, so query
+    batches may go through the batched documents endpoint.
+    """
+
+    factory: Callable[[str], Any]
+    default_model: str
+    remote: bool = True
+    symmetric: bool = False
+
+
+def _openai_factory(model: str) -> Any:
+    module = import_module("langchain_openai")
+    return getattr(module, "OpenAIEmbeddings")(model=model)
+
+
+def _hashed_factory(model: str) -> Any:
+    match = re.fullmatch(r"hashed-ngram-(\d+)(?:-c(\d+))?", model)
+    if not match:
+        raise ValueError(f"Unrecognised hashed embeddings model '{model}'.")
+    sizes = tuple(int(char) for char in match.group(2)) if match.group(2) else (3, 4)
+    return HashedNgramEmbeddings(dimensions=int(match.group(1)), char_ngram_sizes=sizes)
+
+
+_BACKENDS: Dict[str, EmbeddingBackend] = {
+    "openai": EmbeddingBackend(_openai_factory, "text-embedding-3-large", remote=True, symmetric=True),
+    "hashed": EmbeddingBackend(_hashed_factory, "hashed-ngram-384-c34", remote=False, symmetric=True),
+}
+
+
+def register_embedding_backend(
+    name: str,
+    factory: Callable[[str], Any],
+    *,
+    default_model: str,
+    remote: bool = True,
+    symmetric: bool = False,
+) -> None:
+    """Make a custom embeddings implementation selectable by name.
+
+    Pass `symmetric=True` only if `embed_query` and `embed_documents` produce
+    the same vector for the same text.
+    """
+
+    _BACKENDS[name] = EmbeddingBackend(factory, default_model, remote, symmetric)
+
+
+def is_symmetric_backend(backend: Optional[str] = None) -> bool:
+    """Whether `backend` embeds queries the same way as documents."""
+
+    spec = _BACKENDS.get(backend or DEFAULT_EMBEDDINGS_BACKEND)
+    return spec is not None and spec.symmetric
+
+
+def create_embeddings(
+    backend: Optional[str] = None,
+    model: Optional[str] = None,
+) -> Tuple[Any, str, bool]:
+    """Instantiate an embeddings backend.
+
+    Returns `(embeddings, model_id, remote)`. `model_id` identifies the
+    vectors for index manifests and caches; non-OpenAI backends are prefixed
+    with their name so switching backends always forces a rebuild.
+    """
+
+    name = backend or DEFAULT_EMBEDDINGS_BACKEND
+    spec = _BACKENDS.get(name)
+    if spec is None:
+        raise ValueError(f"Unknown embeddings backend '{name}'; available: {', '.join(sorted(_BACKENDS))}.")
+    model_name = model or spec.default_model
+    model_id = model_name if name == "openai" else f"{name}:{model_name}"
+    return spec.factory(model_name), model_id, spec.remote
@@ -0,0 +1,190 @@
+"""Persistent background job queue for long-running generation requests."""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+
+
+class QueueFullError(RuntimeError):
+    """Raised by `JobQueue.submit` when no more jobs can be accepted."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(f"Job queue is full; retry in {retry_after} s.")
+        self.retry_after = retry_after
+
+
+class JobQueue:
+    """Run prompts on in-process worker threads, recording jobs in SQLite.
+
+    `submit` returns a job id as soon as the job is written to disk; workers
+    call `runner(prompt)` and store its JSON-serializable result. Jobs that
+    were queued or running when the process stopped are queued again by
+    `start`, so accepted work survives a restart. At most `max_queued` jobs
+    may wait at once; beyond that `submit` raises `QueueFullError` with a
+    retry hint derived from recent run times.
+    """
+
+    def __init__(
+        self,
+        runner: Callable[[str], Dict[str, Any]],
+        *,
+        db_path: str | Path,
+        workers: int = 2,
+        max_queued: int = 100,
+    ) -> None:
+        if workers < 1:
+            raise ValueError("workers must be at least 1.")
+        self.runner = runner
+        self.db_path = Path(db_path)
+        self.workers = workers
+        self.max_queued = max_queued
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, prompt TEXT NOT NULL, status TEXT NOT NULL, "
+            "created_at REAL NOT NULL, started_at REAL, finished_at REAL, result TEXT, error TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, created_at)")
+        self._lock = threading.Lock()
+        self._pending: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._queued = 0
+        self._running = 0
+        self._durations: List[float] = []
+        self._threads: List[threading.Thread] = []
+        self._stopping = threading.Event()
+
+    @classmethod
+    def from_env(cls, runner: Callable[[str], Dict[str, Any]], *, db_path: str | Path) -> "JobQueue":
+        """Configure from `IDEA2SOLID_JOB_WORKERS` and `IDEA2SOLID_JOB_QUEUE_SIZE`."""
+        return cls(
+            runner,
+            db_path=db_path,
+            workers=int(os.getenv("IDEA2SOLID_JOB_WORKERS", "2")),
+            max_queued=int(os.getenv("IDEA2SOLID_JOB_QUEUE_SIZE", "100")),
+        )
+
+    def start(self) -> "JobQueue":
+        """Requeue unfinished jobs from a previous run and start the workers."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'"
+            )
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at"
+            ).fetchall()
+            for (job_id,) in rows:
+                self._pending.put(job_id)
+            self._queued = len(rows)
+        self._stopping.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"idea2solid-job-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Let workers finish their current job, then exit; queued jobs stay on disk."""
+        self._stopping.set()
+        # Wake workers blocked on an empty queue; the others see the event first.
+        for _ in self._threads:
+            self._pending.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads.clear()
+
+    def submit(self, prompt: str) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            if self._queued >= self.max_queued:
+                raise QueueFullError(self._retry_after())
+            self._conn.execute(
+                "INSERT INTO jobs (id, prompt, status, created_at) VALUES (?, ?, 'queued', ?)",
+                (job_id, prompt, time.time()),
+            )
+            self._queued += 1
+        self._pending.put(job_id)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, prompt, status, created_at, started_at, finished_at, result, error "
+                "FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row[0],
+            "prompt": row[1],
+            "status": row[2],
+            "created_at": row[3],
+            "started_at": row[4],
+            "finished_at": row[5],
+            "result": json.loads(row[6]) if row[6] else None,
+            "error": row[7],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queued": self.max_queued,
+                "queued": self._queued,
+                "running": self._running,
+                "retry_after": self._retry_after(),
+            }
+
+    def _retry_after(self) -> int:
+        # Expected seconds until a queue slot frees up, assuming recent run times.
+        average = sum(self._durations) / len(self._durations) if self._durations else 5.0
+        return max(1, math.ceil(average / self.workers))
+
+    def _work(self) -> None:
+        while True:
+            job_id = self._pending.get()
+            if job_id is None or self._stopping.is_set():
+                # Unclaimed jobs stay 'queued' in SQLite and are picked up by the next start().
+                return
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT prompt FROM jobs WHERE id = ? AND status = 'queued'", (job_id,)
+                ).fetchone()
+                self._queued -= 1
+                if row is None:
+                    continue
+                started = time.time()
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?", (started, job_id)
+                )
+                self._running += 1
+
+            status, result, error = "succeeded", None, None
+            try:
+                result = json.dumps(self.runner(row[0]))
+            except BaseException as exc:
+                # Includes cancellations leaking out of shared async work; the
+                # worker must survive them or every later job stays queued.
+                status, error = "failed", str(exc) or type(exc).__name__
+
+            finished = time.time()
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, finished_at = ?, result = ?, error = ? WHERE id = ?",
+                    (status, finished, result, error, job_id),
+                )
+                self._running -= 1
+                self._durations = (self._durations + [finished - started])[-50:]
@@ -0,0 +1,85 @@
+"""In-memory BM25 index over snippet metadata for exact-term retrieval."""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from .snippet_loader import SnippetRecord
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Title and tag hits are stronger signals than words buried in a summary.
+_FIELD_WEIGHTS = {"title": 2, "tags": 2, "summary": 1, "parameters": 1, "notes": 1}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case alphanumeric tokens; `tooth_count` and `M3` split/keep as expected."""
+
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _record_terms(record: SnippetRecord) -> List[str]:
+    fields = {
+        "title": record.title,
+        "tags": " ".join(record.tags),
+        "summary": record.summary,
+        "parameters": " ".join(f"{name} {desc}" for name, desc in record.parameters.items()),
+        "notes": record.notes,
+    }
+    terms: List[str] = []
+    for name, text in fields.items():
+        terms.extend(tokenize(text) * _FIELD_WEIGHTS[name])
+    return terms
+
+
+class BM25Index:
+    """Okapi BM25 over snippet title, tags, summary, parameters and notes."""
+
+    def __init__(self, records: Iterable[SnippetRecord], *, k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self.identifiers: List[str] = []
+        self._lengths: List[int] = []
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        for position, record in enumerate(records):
+            terms = _record_terms(record)
+            self.identifiers.append(record.identifier)
+            self._lengths.append(len(terms))
+            for term, frequency in Counter(terms).items():
+                self._postings[term].append((position, frequency))
+        count = len(self.identifiers)
+        self._average_length = (sum(self._lengths) / count) if count else 0.0
+        self._idf = {
+            term: math.log(1.0 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    def search(self, query: str, *, k: int = 5) -> List[Tuple[str, float]]:
+        """Return up to `k` `(identifier, score)` pairs with a positive score."""
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for position, frequency in self._postings[term]:
+                norm = 1.0 - self.b + self.b * self._lengths[position] / (self._average_length or 1.0)
+                scores[position] += idf * frequency * (self.k1 + 1.0) / (frequency + self.k1 * norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(self.identifiers[position], score) for position, score in ranked[:k]]
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]],
+    *,
+    k: int = 60,
+) -> List[Tuple[str, float]]:
+    """Fuse ranked identifier lists with RRF; higher fused scores rank first."""
+
+    fused: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, identifier in enumerate(ranking, start=1):
+            fused[identifier] += 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: -item[1])
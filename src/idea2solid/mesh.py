@@ -0,0 +1,124 @@
+"""Vectorized STL reading, binary conversion and mesh statistics."""
+
+from __future__ import annotations
+
+import os
+import re
+import struct
+from importlib import import_module
+from pathlib import Path
+from typing import Any, Dict
+
+_BINARY_HEADER = 80
+_BINARY_RECORD = 50
+_VERTEX_RE = re.compile(rb"vertex\s+(\S+)\s+(\S+)\s+(\S+)")
+
+
+def _numpy() -> Any:
+    return import_module("numpy")
+
+
+def _binary_dtype(numpy: Any) -> Any:
+    return numpy.dtype([("normal", "<f4", (3,)), ("vertices", "<f4", (3, 3)), ("attributes", "<u2")])
+
+
+def is_binary_stl(data: bytes) -> bool:
+    """True when the size matches the triangle count in the binary header."""
+
+    if len(data) < _BINARY_HEADER + 4:
+        return False
+    (count,) = struct.unpack_from("<I", data, _BINARY_HEADER)
+    return len(data) == _BINARY_HEADER + 4 + count * _BINARY_RECORD
+
+
+def read_stl(path: str | Path) -> Any:
+    """Return the triangles of an ASCII or binary STL as an `(n, 3, 3)` float array."""
+
+    return _parse_stl(Path(path).read_bytes(), str(path))
+
+
+def _parse_stl(data: bytes, name: str) -> Any:
+    numpy = _numpy()
+    if is_binary_stl(data):
+        records = numpy.frombuffer(data, dtype=_binary_dtype(numpy), offset=_BINARY_HEADER + 4)
+        return records["vertices"].astype(numpy.float64)
+    if not data.lstrip().startswith(b"solid"):
+        raise ValueError(f"{name} is neither a binary nor an ASCII STL file.")
+    coordinates = numpy.array(_VERTEX_RE.findall(data), dtype=numpy.float64)
+    if coordinates.size % 9:
+        raise ValueError(f"{name} has a facet without three vertices.")
+    return coordinates.reshape(-1, 3, 3)
+
+
+def write_binary_stl(path: str | Path, triangles: Any, *, header: bytes = b"idea2solid") -> None:
+    numpy = _numpy()
+    records = numpy.zeros(len(triangles), dtype=_binary_dtype(numpy))
+    normals = numpy.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    lengths = numpy.linalg.norm(normals, axis=1, keepdims=True)
+    records["normal"] = numpy.divide(normals, lengths, out=numpy.zeros_like(normals), where=lengths > 0)
+    records["vertices"] = triangles
+    with open(path, "wb") as handle:
+        handle.write(header[:_BINARY_HEADER].ljust(_BINARY_HEADER, b"\0"))
+        handle.write(struct.pack("<I", len(triangles)))
+        handle.write(records.tobytes())
+
+
+def convert_to_binary(path: str | Path) -> Any:
+    """Rewrite an ASCII STL as binary in place and return its triangles."""
+
+    path = Path(path)
+    data = path.read_bytes()
+    triangles = _parse_stl(data, str(path))
+    if is_binary_stl(data):
+        return triangles
+    partial = path.with_name(f"{path.name}.partial")
+    write_binary_stl(partial, triangles)
+    os.replace(partial, path)
+    return triangles
+
+
+def mesh_stats(triangles: Any, *, tolerance: float = 1e-6) -> Dict[str, Any]:
+    """Bounding box, triangle count, surface area, volume and watertightness.
+
+    The mesh counts as watertight when, after merging vertices closer than
+    `tolerance`, every edge is shared by exactly two triangles. Volume is the
+    absolute signed tetrahedron sum, meaningful only for watertight meshes.
+    """
+
+    numpy = _numpy()
+    count = len(triangles)
+    if count == 0:
+        return {
+            "triangles": 0,
+            "min": None,
+            "max": None,
+            "size": None,
+            "surface_area": 0.0,
+            "volume": 0.0,
+            "watertight": False,
+        }
+
+    flat = triangles.reshape(-1, 3)
+    lower = flat.min(axis=0)
+    upper = flat.max(axis=0)
+    first, second, third = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+    crosses = numpy.cross(second - first, third - first)
+    area = 0.5 * numpy.linalg.norm(crosses, axis=1).sum()
+    volume = abs(numpy.einsum("ij,ij->", first, numpy.cross(second, third))) / 6.0
+
+    quantized = numpy.round(flat / tolerance).astype(numpy.int64)
+    _, vertex_ids = numpy.unique(quantized, axis=0, return_inverse=True)
+    faces = vertex_ids.reshape(-1, 3)
+    edges = numpy.sort(numpy.concatenate([faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]]), axis=1)
+    _, edge_counts = numpy.unique(edges, axis=0, return_counts=True)
+    watertight = bool((edge_counts == 2).all())
+
+    return {
+        "triangles": int(count),
+        "min": [round(float(value), 6) for value in lower],
+        "max": [round(float(value), 6) for value in upper],
+        "size": [round(float(value), 6) for value in upper - lower],
+        "surface_area": round(float(area), 6),
+        "volume": round(float(volume), 6),
+        "watertight": watertight,
+    }
@@ -0,0 +1,114 @@
+"""One-time discovery of what an OpenSCAD binary supports."""
+
+from __future__ import annotations
+
+import re
+import subprocess
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+# Formats every OpenSCAD release since 2015 can write; used when `--help`
+# does not list them.
+_DEFAULT_EXPORT_FORMATS = ("stl", "off", "amf", "csg", "dxf", "svg", "echo", "ast")
+_FLAG_RE = re.compile(r"--[a-z][a-z0-9-]*")
+_FORMATS_RE = re.compile(r"specifies the type:\s*([a-z0-9, ]+)", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class OpenScadCapabilities:
+    """What `path` can do and the cheapest way to use it.
+
+    `validation` is the strategy for a validation-only run: `check` when the
+    binary has an unambiguous `--check` flag, otherwise `csg` (evaluate the
+    script and export the CSG tree, skipping geometry) or a full `render`.
+    `render_flags` are added to every STL export: the Manifold backend when
+    available and binary STL output when supported.
+    """
+
+    path: str
+    available: bool
+    version: str
+    flags: FrozenSet[str]
+    export_formats: Tuple[str, ...]
+    backend: Optional[str]
+    validation: str
+    render_flags: Tuple[str, ...]
+
+    def as_dict(self) -> Dict[str, Any]:
+        payload = asdict(self)
+        payload["flags"] = sorted(self.flags)
+        payload["export_formats"] = list(self.export_formats)
+        payload["render_flags"] = list(self.render_flags)
+        return payload
+
+
+def _run(path: str, flag: str) -> Optional[str]:
+    try:
+        result = subprocess.run([path, flag], check=False, capture_output=True, text=True, timeout=30)
+    except (FileNotFoundError, PermissionError, subprocess.TimeoutExpired):
+        return None
+    # OpenSCAD prints both its version and its help on stderr.
+    return f"{result.stderr}\n{result.stdout}".strip()
+
+
+def _backend_flag(help_text: str, flags: FrozenSet[str]) -> Tuple[Optional[str], Tuple[str, ...]]:
+    lowered = help_text.lower()
+    if "manifold" not in lowered:
+        return None, ()
+    if "--backend" in flags:
+        return "manifold", ("--backend=Manifold",)
+    if "--enable" in flags:
+        # 2023-2024 development snapshots ship Manifold as an experimental feature.
+        return "manifold", ("--enable=manifold",)
+    return None, ()
+
+
+@lru_cache(maxsize=None)
+def probe_openscad(path: str) -> OpenScadCapabilities:
+    """Run `--version` and `--help` once per binary path and cache the result."""
+
+    version_text = _run(path, "--version")
+    if version_text is None:
+        return OpenScadCapabilities(
+            path=path,
+            available=False,
+            version="unknown",
+            flags=frozenset(),
+            export_formats=(),
+            backend=None,
+            validation="render",
+            render_flags=(),
+        )
+
+    help_text = _run(path, "--help") or ""
+    flags = frozenset(_FLAG_RE.findall(help_text))
+    formats_match = _FORMATS_RE.search(help_text)
+    if formats_match:
+        export_formats = tuple(fmt.strip() for fmt in formats_match.group(1).split(",") if fmt.strip())
+    else:
+        export_formats = _DEFAULT_EXPORT_FORMATS
+    if "binstl" in help_text and "binstl" not in export_formats:
+        export_formats = (*export_formats, "binstl")
+
+    if "--check" in flags:
+        validation = "check"
+    elif "csg" in export_formats:
+        validation = "csg"
+    else:
+        validation = "render"
+
+    backend, render_flags = _backend_flag(help_text, flags)
+    if "binstl" in export_formats and "--export-format" in flags:
+        render_flags = (*render_flags, "--export-format=binstl")
+
+    return OpenScadCapabilities(
+        path=path,
+        available=True,
+        version=version_text.splitlines()[0].strip() or "unknown",
+        flags=flags,
+        export_formats=export_formats,
+        backend=backend,
+        validation=validation,
+        render_flags=render_flags,
+    )
@@ -1,18 +1,36 @@
 from __future__ import annotations
 
+import asyncio
+import functools
 import os
 import re
 import subprocess
 import tempfile
+import threading
+import time
 import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from importlib import import_module
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Sequence, TypedDict
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, TypedDict
 
-from .vector_store import SnippetVectorStore
+from .artifacts import ArtifactStore
+from .context_packer import default_context_budget, format_snippet, pack_context
+from .mesh import convert_to_binary, mesh_stats
+from .scad_lint import _ParseError, _tokenize, lint_scad
+from .response_cache import SemanticResponseCache
+from .openscad_caps import probe_openscad
+from .render_cache import RenderCache, default_render_cache_bytes
+from .render_pool import RenderLimitError, RenderPool, get_default_render_pool
+from .vector_store import DEFAULT_RETRIEVAL_MODE, SnippetVectorStore, check_retrieval_mode
 
 
 DEFAULT_MODEL = os.getenv("IDEA2SOLID_MODEL", "gpt-4o-mini")
+COMPILE_MODES = ("fused", "separate", "progressive")
+# Coarse facet settings for progressive previews: OpenSCAD's default angle and
+# size limits, with top-level `$fn` reset and explicit `$fn` values capped.
+PREVIEW_DEFINES = (("$fn", "0"), ("$fa", "12"), ("$fs", "2"))
+PREVIEW_MAX_FN = 24
 
 
 class GenerationState(TypedDict, total=False):
@@ -20,13 +38,22 @@ class GenerationState(TypedDict, total=False):
 
     question: str
     snippets: List[Dict[str, Any]]
+    dropped_snippets: List[Dict[str, Any]]
     context: str
+    context_tokens: int
     prompt: str
     code: str
     validation: Dict[str, Any]
     errors: List[str]
     export: Dict[str, Any]
+    render: Dict[str, Any]
     stl_path: str
+    response_cache: Dict[str, Any]
+    attempts: int
+    repairs: List[Dict[str, Any]]
+    speculation: Dict[str, Any]
+    preview: Dict[str, Any]
+    started_at: float
 
 
 def _lazy_import(module_path: str, attr: str) -> Any:
@@ -38,7 +65,39 @@ def _ingest(state: GenerationState) -> GenerationState:
     question = state.get("question")
     if not question or not question.strip():
         raise ValueError("Pipeline requires a non-empty 'question' in the state.")
-    return {"question": question.strip()}
+    return {"question": question.strip(), "started_at": time.time()}
+
+
+def _cache_lookup(
+    state: GenerationState,
+    *,
+    response_cache: SemanticResponseCache,
+) -> GenerationState:
+    question = state.get("question", "")
+    hit = response_cache.lookup(question)
+    if hit is None:
+        return {"response_cache": {"hit": False}}
+    result, similarity, cached_question = hit
+    update: GenerationState = {**result, "errors": []}  # type: ignore[typeddict-item]
+    update["response_cache"] = {
+        "hit": True,
+        "similarity": round(similarity, 4),
+        "matched_question": cached_question,
+    }
+    return update
+
+
+def _cache_store(
+    state: GenerationState,
+    *,
+    response_cache: SemanticResponseCache,
+) -> GenerationState:
+    stored = response_cache.store(state.get("question", ""), dict(state))
+    return {"response_cache": {"hit": False, "stored": stored}}
+
+
+def _route_cache_lookup(state: GenerationState) -> str:
+    return "hit" if (state.get("response_cache") or {}).get("hit") else "miss"
 
 
 def _retrieve(
@@ -46,70 +105,101 @@ def _retrieve(
     vector_store: SnippetVectorStore,
     *,
     top_k: int,
+    retrieval_mode: str,
+    context_budget: int = 0,
+    fetch_k: Optional[int] = None,
+    model: Optional[str] = None,
 ) -> GenerationState:
     question = state.get("question")
-    raw_results: Sequence[Any] = vector_store.similarity_search_with_score(
-        question, k=top_k
+    raw_results: Sequence[Any] = vector_store.search(
+        question, k=fetch_k or top_k, mode=retrieval_mode
     )
-    snippets: List[Dict[str, Any]] = []
-    context_blocks: List[str] = []
-    for index, result in enumerate(raw_results, start=1):
+    candidates: List[Dict[str, Any]] = []
+    for result in raw_results:
         doc, score = result
         metadata = getattr(doc, "metadata", {}) or {}
-        code = _extract_code(doc.page_content)
-        snippet = {
-            "id": metadata.get("id"),
-            "title": metadata.get("title"),
-            "summary": metadata.get("summary"),
-            "parameters": metadata.get("parameters"),
-            "tags": metadata.get("tags"),
-            "notes": metadata.get("notes"),
-            "score": score,
-            "code": code,
-        }
-        snippets.append(snippet)
-        context_blocks.append(
-            "\n".join(
-                [
-                    f"Snippet {index}: {snippet['title']}",
-                    f"Score: {score:.4f}",
-                    f"Summary: {snippet['summary']}",
-                    "Parameters:",
-                    "\n".join(
-                        f"- {name}: {desc}"
-                        for name, desc in (snippet.get("parameters") or {}).items()
-                    ),
-                    "Code:",
-                    code,
-                ]
-            )
+        candidates.append(
+            {
+                "id": metadata.get("id"),
+                "title": metadata.get("title"),
+                "summary": metadata.get("summary"),
+                "parameters": metadata.get("parameters"),
+                "tags": metadata.get("tags"),
+                "notes": metadata.get("notes"),
+                "score": score,
+                "code": _extract_code(doc.page_content),
+            }
         )
 
+    packed = pack_context(candidates, max_snippets=top_k, budget_tokens=context_budget, model=model)
     return {
-        "snippets": snippets,
-        "context": "\n\n".join(context_blocks),
+        "snippets": packed.selected,
+        "context": packed.context,
+        "context_tokens": packed.tokens,
+        "dropped_snippets": packed.dropped,
     }
 
 
-def _build_prompt(question: str, context: str, cheatsheet: str = "") -> str:
+_CHEATSHEET_PATH = Path(__file__).parent.parent.parent / "data" / "snippets" / "openscad_cheatsheet.txt"
+
+
+def _system_prompt(cheatsheet: str = "") -> str:
+    """Static instructions shared by every request, kept first for prefix caching."""
+
     return (
+        "You generate OpenSCAD code only.\n\n"
         "You are an OpenSCAD expert helping convert natural language requests into "
         "valid OpenSCAD code. Follow these rules:\n"
         "- Use only OpenSCAD syntax supported by the latest stable release.\n"
-        "- Define a `module main()` entry point that renders the design.\n"
+        "- Define a `module main()` entry point that renders the design, and call `main();` at the top level.\n"
         "- Keep tunable parameters at the top with sensible defaults.\n"
         "- Avoid importing external libraries.\n"
         "- Return only OpenSCAD code.\n"
         "- CRITICAL: You must strictly adhere to any dimensions provided in the user request. If the user asks for a 50mm width, the model must be exactly 50mm wide.\n"
 
         "\n"
-        f"OpenSCAD Cheat Sheet:\n{cheatsheet}\n\n"
-        f"User request:\n{question}\n\n"
+        f"OpenSCAD Cheat Sheet:\n{cheatsheet}"
+    )
+
+
+def _request_prompt(question: str, context: str) -> str:
+    """Per-request part of the prompt: retrieved snippets, then the question."""
+
+    return (
         f"Reference snippets:\n{context}\n\n"
+        f"User request:\n{question}\n\n"
         "OpenSCAD code:"
     )
 
 
+_REPAIR_SYSTEM_PROMPT = (
+    "You repair OpenSCAD code. Fix the errors reported by OpenSCAD while keeping "
+    "the design, parameters, the `module main()` entry point and the top-level "
+    "`main();` call. Do not use `import()`. Return only the corrected OpenSCAD code."
+)
+
+
+def _trim_stderr(stderr: str, *, max_lines: int = 20, max_chars: int = 1500) -> str:
+    """Keep the OpenSCAD diagnostics that matter: errors and warnings first."""
+
+    lines = [line.strip() for line in stderr.splitlines() if line.strip()]
+    flagged = [line for line in lines if re.match(r"(ERROR|WARNING|Parser error)", line, re.IGNORECASE)]
+    kept = (flagged or lines)[-max_lines:]
+    return "\n".join(kept)[-max_chars:]
+
+
+def _repair_prompt(question: str, code: str, stderr: str, snippets: Sequence[Dict[str, Any]] = ()) -> str:
+    # The same snippets as the first attempt, without parameter lists to keep repairs short.
+    context = "\n\n".join(format_snippet(snippet, index, compact=True) for index, snippet in enumerate(snippets, 1))
+    return (
+        f"User request:\n{question}\n\n"
+        + (f"Reference snippets:\n{context}\n\n" if context else "")
+        + f"Previous OpenSCAD code:\n{code}\n\n"
+        f"OpenSCAD output:\n{stderr or 'The model returned no code.'}\n\n"
+        "Corrected OpenSCAD code:"
+    )
+
+
 def _apply_guardrails(code: str) -> List[str]:
     errors: List[str] = []
     if not re.search(r"module\s+main\s*\(", code):
@@ -119,79 +209,496 @@ def _apply_guardrails(code: str) -> List[str]:
     return errors
 
 
-def _synthesize(
-    state: GenerationState,
-    *,
-    model: str,
-    temperature: float,
-) -> GenerationState:
-    context = state.get("context", "")
-    question = state.get("question", "")
+class _Synthesizer:
+    """Chat client and static system prompt, built once per compiled graph.
 
-    cheatsheet_path = Path(__file__).parent.parent.parent / "data" / "snippets" / "openscad_cheatsheet.txt"
-    cheatsheet = ""
-    if cheatsheet_path.exists():
-        cheatsheet = cheatsheet_path.read_text()
+    The client is created lazily on first use and then reused, so its HTTP
+    connection pool survives across requests. Pass `llm` to supply any chat
+    model exposing `invoke`/`ainvoke`.
+    """
 
-    prompt = _build_prompt(question, context, cheatsheet)
+    def __init__(self, *, model: str, temperature: float, llm: Any = None) -> None:
+        self.model = model
+        self.temperature = temperature
+        self._llm = llm
+        self._system_message: Any = None
+        self._lock = threading.Lock()
 
-    chat_cls = _lazy_import("langchain_openai", "ChatOpenAI")
-    messages_module = import_module("langchain_core.messages")
-    system_message = getattr(messages_module, "SystemMessage")
-    human_message = getattr(messages_module, "HumanMessage")
+    @property
+    def llm(self) -> Any:
+        if self._llm is None:
+            with self._lock:
+                if self._llm is None:
+                    chat_cls = _lazy_import("langchain_openai", "ChatOpenAI")
+                    self._llm = chat_cls(model=self.model, temperature=self.temperature)
+        return self._llm
 
-    llm = chat_cls(model=model, temperature=temperature)
-    response = llm.invoke(
-        [
-            system_message(content="You generate OpenSCAD code only."),
-            human_message(content=prompt),
-        ]
-    )
+    @property
+    def system_message(self) -> Any:
+        if self._system_message is None:
+            with self._lock:
+                if self._system_message is None:
+                    cheatsheet = _CHEATSHEET_PATH.read_text() if _CHEATSHEET_PATH.exists() else ""
+                    system_cls = _lazy_import("langchain_core.messages", "SystemMessage")
+                    self._system_message = system_cls(content=_system_prompt(cheatsheet))
+        return self._system_message
+
+    def messages(self, state: GenerationState) -> Tuple[str, List[Any]]:
+        system_message = self.system_message
+        human_cls = _lazy_import("langchain_core.messages", "HumanMessage")
+        request = _request_prompt(state.get("question", ""), state.get("context", ""))
+        prompt = f"{system_message.content}\n\n{request}"
+        return prompt, [system_message, human_cls(content=request)]
+
+    def repair_messages(self, state: GenerationState) -> List[Any]:
+        validation = state.get("validation") or {}
+        prompt = _repair_prompt(
+            state.get("question", ""),
+            state.get("code", ""),
+            _trim_stderr(validation.get("stderr", "")),
+            state.get("snippets") or (),
+        )
+        system_cls = _lazy_import("langchain_core.messages", "SystemMessage")
+        human_cls = _lazy_import("langchain_core.messages", "HumanMessage")
+        return [system_cls(content=_REPAIR_SYSTEM_PROMPT), human_cls(content=prompt)]
+
+
+def _synthesis_result(prompt: str, response: Any) -> GenerationState:
     code = _normalize_code(getattr(response, "content", ""))
     errors = _apply_guardrails(code)
-    return {"prompt": prompt, "code": code, "errors": errors}
+    return {"prompt": prompt, "code": code, "errors": errors, "attempts": 1}
 
 
-def _validate(
+def _synthesize(state: GenerationState, *, synthesizer: _Synthesizer) -> GenerationState:
+    prompt, messages = synthesizer.messages(state)
+    return _synthesis_result(prompt, synthesizer.llm.invoke(messages))
+
+
+async def _asynthesize(state: GenerationState, *, synthesizer: _Synthesizer) -> GenerationState:
+    prompt, messages = synthesizer.messages(state)
+    return _synthesis_result(prompt, await synthesizer.llm.ainvoke(messages))
+
+
+def _repair_result(state: GenerationState, response: Any, started: float) -> GenerationState:
+    """Replace the code with the repaired version and log the failed attempt."""
+
+    validation = state.get("validation") or {}
+    code = _normalize_code(getattr(response, "content", ""))
+    repairs = list(state.get("repairs", []))
+    repairs.append(
+        {
+            "attempt": state.get("attempts", 1),
+            "status": validation.get("status", "empty"),
+            "stderr": _trim_stderr(validation.get("stderr", "")),
+            "seconds": round(time.monotonic() - started, 3),
+        }
+    )
+    return {
+        "code": code,
+        "errors": _apply_guardrails(code),
+        "attempts": state.get("attempts", 1) + 1,
+        "repairs": repairs,
+        "validation": {},
+        "render": {},
+    }
+
+
+def _repair(state: GenerationState, *, synthesizer: _Synthesizer) -> GenerationState:
+    started = time.monotonic()
+    messages = synthesizer.repair_messages(state)
+    return _repair_result(state, synthesizer.llm.invoke(messages), started)
+
+
+async def _arepair(state: GenerationState, *, synthesizer: _Synthesizer) -> GenerationState:
+    started = time.monotonic()
+    messages = synthesizer.repair_messages(state)
+    return _repair_result(state, await synthesizer.llm.ainvoke(messages), started)
+
+
+def _route_validation(state: GenerationState, *, max_attempts: int, time_budget: float) -> str:
+    """Send failed validations back for repair while attempts and time remain."""
+
+    status = (state.get("validation") or {}).get("status")
+    if status != "failed" and state.get("code", "").strip():
+        return "export"
+    if state.get("attempts", 1) >= max_attempts:
+        return "export"
+    if time_budget and time.time() - state.get("started_at", time.time()) >= time_budget:
+        return "export"
+    return "repair"
+
+
+def _write_scad(code: str) -> Path:
+    with tempfile.NamedTemporaryFile("w", suffix=".scad", delete=False) as handle:
+        handle.write(code)
+        return Path(handle.name)
+
+
+async def _awrite_scad(code: str) -> Path:
+    aiofiles = import_module("aiofiles")
+    handle_fd, handle_name = tempfile.mkstemp(suffix=".scad")
+    os.close(handle_fd)
+    async with aiofiles.open(handle_name, "w") as handle:
+        await handle.write(code)
+    return Path(handle_name)
+
+
+def _validate_prepare(
     state: GenerationState,
     *,
     openscad_path: str,
-) -> GenerationState:
+    render_cache: Optional[RenderCache],
+    prevalidate: bool = True,
+) -> Tuple[Optional[GenerationState], Optional[str]]:
+    """Return an early state update (empty code, lint failure, cache hit) and the cache key."""
+
     code = state.get("code", "")
     errors = list(state.get("errors", []))
     if not code.strip():
         errors.append("Model returned empty OpenSCAD code.")
-        return {"errors": errors}
+        return {"errors": errors, "render": {}}, None
 
-    with tempfile.NamedTemporaryFile("w", suffix=".scad", delete=False) as handle:
-        handle.write(code)
-        handle_path = Path(handle.name)
+    problems = lint_scad(code) if prevalidate else []
+    if problems:
+        # Shaped like OpenSCAD output so repair prompts read it the same way.
+        stderr = "\n".join(f"ERROR: {problem}" for problem in problems)
+        errors.append("OpenSCAD validation failed; check stderr for details.")
+        validation = {"status": "failed", "stdout": "", "stderr": stderr, "prevalidated": True}
+        return {"validation": validation, "errors": errors, "render": {}}, None
 
-    try:
-        result = _run_openscad_check(openscad_path, handle_path)
-    except FileNotFoundError:
+    cache_key = _render_cache_key(render_cache, code, openscad_path)
+    cached = render_cache.lookup(cache_key) if render_cache and cache_key else None
+    if cached is not None:
+        # Identical source already rendered successfully: skip both passes.
+        validation = {"status": "passed", "stdout": "", "stderr": "", "cached": True}
+        render = {"stl_path": str(cached), "stdout": "", "stderr": "", "cached": True}
+        return {"validation": validation, "errors": errors, "render": render}, cache_key
+
+    return None, cache_key
+
+
+def _validate_finish(
+    state: GenerationState,
+    outcome: Any,
+    *,
+    stl_path: Optional[Path],
+    render_cache: Optional[RenderCache],
+    cache_key: Optional[str],
+    preview: bool = False,
+) -> GenerationState:
+    errors = list(state.get("errors", []))
+    render: Dict[str, Any] = {}
+    if isinstance(outcome, FileNotFoundError):
         errors.append("OpenSCAD CLI not found. Install it or set OPENSCAD_PATH.")
         validation = {"status": "missing", "stderr": ""}
+    elif isinstance(outcome, RenderLimitError):
+        errors.append(f"OpenSCAD validation stopped: {outcome}")
+        validation = {"status": outcome.status, "stdout": outcome.stdout, "stderr": outcome.stderr}
     else:
         validation = {
-            "status": "passed" if result.returncode == 0 else "failed",
-            "stdout": result.stdout.strip(),
-            "stderr": result.stderr.strip(),
+            "status": "passed" if outcome.returncode == 0 else "failed",
+            "stdout": outcome.stdout.strip(),
+            "stderr": outcome.stderr.strip(),
         }
-        if result.returncode != 0:
+        if outcome.returncode != 0:
             errors.append("OpenSCAD validation failed; check stderr for details.")
+        elif stl_path is not None and preview:
+            # The coarse render proves the code is valid; export still renders full quality.
+            # Previews are short-lived, so they are served from the output
+            # directory rather than published and compressed as artifacts.
+            preview_info = {"stl_path": str(stl_path), "mesh": _finalize_stl(stl_path)}
+            return {"validation": validation, "errors": errors, "render": {}, "preview": preview_info}
+        elif stl_path is not None:
+            mesh = _finalize_stl(stl_path)
+            if render_cache and cache_key:
+                stl_path = render_cache.store(cache_key, stl_path)
+            render = {
+                "stl_path": str(stl_path),
+                "stdout": validation["stdout"],
+                "stderr": validation["stderr"],
+                "mesh": mesh,
+            }
+
+    if stl_path is not None and not render:
+        stl_path.unlink(missing_ok=True)
+    return {"validation": validation, "errors": errors, "render": render}
+
+
+def _validate(
+    state: GenerationState,
+    *,
+    openscad_path: str,
+    render_pool: RenderPool,
+    compile_mode: str = "fused",
+    output_dir: Optional[str | Path] = None,
+    render_cache: Optional[RenderCache] = None,
+    prevalidate: bool = True,
+) -> GenerationState:
+    early, cache_key = _validate_prepare(
+        state, openscad_path=openscad_path, render_cache=render_cache, prevalidate=prevalidate
+    )
+    if early is not None:
+        return early
+
+    preview = compile_mode == "progressive"
+    code = state.get("code", "")
+    scad_path = _write_scad(_preview_code(code) if preview else code)
+    # In fused mode the validation run *is* the export render: one OpenSCAD
+    # invocation writes the final STL and its exit status is the verdict.
+    # Progressive mode validates with a coarse preview render instead.
+    stl_path = _new_stl_path(output_dir, preview=preview) if compile_mode != "separate" else None
+    defines = PREVIEW_DEFINES if preview else ()
+    started = time.monotonic()
+    try:
+        if stl_path is not None:
+            outcome: Any = _render_stl(render_pool, openscad_path, scad_path, stl_path, defines=defines)
+        else:
+            outcome = _run_openscad_check(render_pool, openscad_path, scad_path)
+    except (FileNotFoundError, RenderLimitError) as exc:
+        outcome = exc
     finally:
-        handle_path.unlink(missing_ok=True)
+        scad_path.unlink(missing_ok=True)
 
-    return {"validation": validation, "errors": errors}
+    update = _validate_finish(
+        state,
+        outcome,
+        stl_path=stl_path,
+        render_cache=render_cache,
+        cache_key=cache_key,
+        preview=preview,
+    )
+    if "preview" in update:
+        update["preview"]["seconds"] = round(time.monotonic() - started, 3)
+    return update
 
 
-def _export(
+async def _avalidate(
     state: GenerationState,
     *,
     openscad_path: str,
-    output_dir: Optional[str | Path],
+    render_pool: RenderPool,
+    compile_mode: str = "fused",
+    output_dir: Optional[str | Path] = None,
+    render_cache: Optional[RenderCache] = None,
+    prevalidate: bool = True,
 ) -> GenerationState:
+    early, cache_key = _validate_prepare(
+        state, openscad_path=openscad_path, render_cache=render_cache, prevalidate=prevalidate
+    )
+    if early is not None:
+        return early
+
+    preview = compile_mode == "progressive"
+    code = state.get("code", "")
+    scad_path = await _awrite_scad(_preview_code(code) if preview else code)
+    stl_path = _new_stl_path(output_dir, preview=preview) if compile_mode != "separate" else None
+    defines = PREVIEW_DEFINES if preview else ()
+    started = time.monotonic()
+    try:
+        if stl_path is not None:
+            outcome: Any = await _arender_stl(render_pool, openscad_path, scad_path, stl_path, defines=defines)
+        else:
+            outcome = await _arun_openscad_check(render_pool, openscad_path, scad_path)
+    except (FileNotFoundError, RenderLimitError) as exc:
+        outcome = exc
+    except asyncio.CancelledError:
+        if stl_path is not None:
+            stl_path.unlink(missing_ok=True)
+        raise
+    finally:
+        scad_path.unlink(missing_ok=True)
+
+    # Binary conversion and mesh statistics read and rewrite the whole STL;
+    # keep them off the event loop.
+    update = await asyncio.to_thread(
+        _validate_finish,
+        state,
+        outcome,
+        stl_path=stl_path,
+        render_cache=render_cache,
+        cache_key=cache_key,
+        preview=preview,
+    )
+    if "preview" in update:
+        update["preview"]["seconds"] = round(time.monotonic() - started, 3)
+    return update
+
+
+def _candidate_variants(
+    candidates: int | Sequence[Mapping[str, Any]],
+    *,
+    model: str,
+    temperature: float,
+) -> List[Dict[str, Any]]:
+    """Expand `candidates` into `{model, temperature}` settings per candidate.
+
+    An integer N samples the configured model N times with temperatures
+    spread upwards from `temperature` for diversity.
+    """
+
+    if isinstance(candidates, int):
+        return [
+            {"model": model, "temperature": round(min(1.0, temperature + 0.3 * index), 2)}
+            for index in range(max(candidates, 1))
+        ]
+    return [
+        {"model": item.get("model", model), "temperature": item.get("temperature", temperature)}
+        for item in candidates
+    ]
+
+
+class _Speculation:
+    """Bookkeeping shared by the sync and async speculative nodes."""
+
+    def __init__(self, synthesizers: Sequence[_Synthesizer], validate_options: Dict[str, Any]) -> None:
+        self.started = time.monotonic()
+        self.validate_options = validate_options
+        self.report = [
+            {"index": index, "model": synthesizer.model, "temperature": synthesizer.temperature, "status": "cancelled"}
+            for index, synthesizer in enumerate(synthesizers)
+        ]
+        self.winner: Optional[Tuple[int, GenerationState]] = None
+        self.fallback: Optional[Tuple[int, GenerationState]] = None
+        self.first_error: Optional[BaseException] = None
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def settle(self, index: int, error: Optional[BaseException], result: Any = None) -> None:
+        entry = self.report[index]
+        entry["seconds"] = round(self.elapsed(), 3)
+        if error is not None:
+            entry.update({"status": "error", "error": str(error)})
+            self.first_error = self.first_error or error
+            return
+        update, synthesized = result
+        entry["synthesis_seconds"] = round(synthesized, 3)
+        entry["status"] = (update.get("validation") or {}).get("status", "empty")
+        if entry["status"] == "passed" and self.winner is None:
+            self.winner = (index, update)
+        elif entry["status"] == "passed":
+            _discard_render(update, self.validate_options)
+        elif self.fallback is None:
+            self.fallback = (index, update)
+
+    def result(self) -> GenerationState:
+        chosen = self.winner or self.fallback
+        if chosen is None:
+            assert self.first_error is not None
+            raise self.first_error
+        index, update = chosen
+        speculation = {
+            "winner": index if self.winner else None,
+            "chosen": index,
+            "model": self.report[index]["model"],
+            "temperature": self.report[index]["temperature"],
+            "seconds": round(self.elapsed(), 3),
+            "candidates": self.report,
+        }
+        return {**update, "speculation": speculation}  # type: ignore[typeddict-item]
+
+
+async def _aspeculate(
+    state: GenerationState,
+    *,
+    synthesizers: Sequence[_Synthesizer],
+    validate_options: Dict[str, Any],
+) -> GenerationState:
+    """Synthesize and validate every candidate concurrently; first pass wins.
+
+    Outstanding candidates are cancelled (including their OpenSCAD runs) once
+    one passes. If none passes, the first candidate to finish is returned so
+    the repair loop can work on it.
+    """
+
+    speculation = _Speculation(synthesizers, validate_options)
+
+    async def attempt(synthesizer: _Synthesizer) -> Tuple[GenerationState, float]:
+        prompt, messages = synthesizer.messages(state)
+        update = _synthesis_result(prompt, await synthesizer.llm.ainvoke(messages))
+        synthesized = speculation.elapsed()
+        update.update(await _avalidate({**state, **update}, **validate_options))  # type: ignore[typeddict-item]
+        return update, synthesized
+
+    tasks = {asyncio.ensure_future(attempt(synthesizer)): index for index, synthesizer in enumerate(synthesizers)}
+    pending = set(tasks)
+    try:
+        while pending and speculation.winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                error = task.exception()
+                speculation.settle(tasks[task], error, None if error else task.result())
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    return speculation.result()
+
+
+def _speculate(
+    state: GenerationState,
+    *,
+    synthesizers: Sequence[_Synthesizer],
+    validate_options: Dict[str, Any],
+) -> GenerationState:
+    """Thread-based counterpart of `_aspeculate` for synchronous `invoke`.
+
+    Uses the blocking chat-model and OpenSCAD paths so no event loop is
+    created per call. Threads cannot be interrupted, so once the outcome is
+    decided a loser still waiting on the model skips validation; one already
+    rendering finishes in the background and its STL is discarded.
+    """
+
+    speculation = _Speculation(synthesizers, validate_options)
+    decided = threading.Event()
+
+    def attempt(synthesizer: _Synthesizer) -> Tuple[GenerationState, float]:
+        prompt, messages = synthesizer.messages(state)
+        update = _synthesis_result(prompt, synthesizer.llm.invoke(messages))
+        synthesized = speculation.elapsed()
+        if decided.is_set():
+            return update, synthesized
+        update.update(_validate({**state, **update}, **validate_options))  # type: ignore[typeddict-item]
+        return update, synthesized
+
+    def discard_late(future: Future) -> None:
+        if not future.cancelled() and future.exception() is None:
+            _discard_render(future.result()[0], validate_options)
+
+    executor = ThreadPoolExecutor(max_workers=len(synthesizers), thread_name_prefix="idea2solid-candidate")
+    futures = {executor.submit(attempt, synthesizer): index for index, synthesizer in enumerate(synthesizers)}
+    pending = set(futures)
+    try:
+        while pending and speculation.winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                speculation.settle(futures[future], error, None if error else future.result())
+    finally:
+        decided.set()
+        for future in pending:
+            if not future.cancel():
+                future.add_done_callback(discard_late)
+        executor.shutdown(wait=False)
+    return speculation.result()
+
+
+def _discard_render(update: GenerationState, validate_options: Dict[str, Any]) -> None:
+    """Delete a losing candidate's STL unless the render cache now owns it."""
+
+    render = update.get("render") or {}
+    if render.get("stl_path") and validate_options.get("render_cache") is None:
+        Path(render["stl_path"]).unlink(missing_ok=True)
+
+
+def _export_prepare(
+    state: GenerationState,
+    *,
+    artifact_store: Optional[ArtifactStore] = None,
+) -> Optional[GenerationState]:
+    """Return the export update when no new render is needed."""
+
     errors = list(state.get("errors", []))
     validation = state.get("validation", {}) or {}
     status = validation.get("status")
@@ -199,138 +706,579 @@ def _export(
         errors.append("STL export skipped because validation did not pass.")
         return {"errors": errors}
 
+    render = state.get("render") or {}
+    if render.get("stl_path"):
+        # Already rendered by the fused validation pass or found in the cache.
+        export_info = {
+            "status": "success",
+            "stdout": render.get("stdout", ""),
+            "stderr": render.get("stderr", ""),
+            "compile_mode": "fused",
+            "mesh": render["mesh"] if "mesh" in render else _finalize_stl(Path(render["stl_path"])),
+        }
+        if render.get("cached"):
+            export_info.update({"compile_mode": "cached", "cached": True})
+        if artifact_store is not None:
+            export_info["artifact"] = _publish_artifact(artifact_store, Path(render["stl_path"]))
+        return {"export": export_info, "stl_path": render["stl_path"], "errors": errors}
+
     code = state.get("code", "")
     if not code.strip():
         errors.append("No OpenSCAD code available for STL export.")
         return {"errors": errors}
 
-    export_dir = Path(output_dir) if output_dir else Path("outputs")
-    export_dir.mkdir(parents=True, exist_ok=True)
+    return None
 
-    with tempfile.NamedTemporaryFile("w", suffix=".scad", delete=False) as handle:
-        handle.write(code)
-        scad_path = Path(handle.name)
-
-    stl_filename = f"idea2solid_{uuid.uuid4().hex}.stl"
-    stl_path = export_dir / stl_filename
 
-    try:
-        result = subprocess.run(
-            [openscad_path, "-o", str(stl_path), str(scad_path)],
-            check=False,
-            capture_output=True,
-            text=True,
-        )
-    except FileNotFoundError:
+def _export_finish(
+    state: GenerationState,
+    outcome: Any,
+    *,
+    stl_path: Path,
+    openscad_path: str,
+    render_cache: Optional[RenderCache],
+    artifact_store: Optional[ArtifactStore] = None,
+) -> GenerationState:
+    errors = list(state.get("errors", []))
+    # The full-quality render replaces the preview, whatever its outcome.
+    preview = _discard_preview(state)
+    if isinstance(outcome, FileNotFoundError):
         errors.append("OpenSCAD CLI not found during export. Install it or set OPENSCAD_PATH.")
-        export_info = {"status": "missing", "stderr": ""}
         stl_path.unlink(missing_ok=True)
-        scad_path.unlink(missing_ok=True)
-        return {"errors": errors, "export": export_info}
-
-    scad_path.unlink(missing_ok=True)
+        return {"errors": errors, "export": {"status": "missing", "stderr": ""}, **preview}
+    if isinstance(outcome, RenderLimitError):
+        errors.append(f"OpenSCAD export stopped: {outcome}")
+        stl_path.unlink(missing_ok=True)
+        export_info = {"status": outcome.status, "stdout": outcome.stdout, "stderr": outcome.stderr}
+        return {"errors": errors, "export": export_info, **preview}
 
     export_info = {
-        "status": "success" if result.returncode == 0 else "failed",
-        "stdout": result.stdout.strip(),
-        "stderr": result.stderr.strip(),
+        "status": "success" if outcome.returncode == 0 else "failed",
+        "stdout": outcome.stdout.strip(),
+        "stderr": outcome.stderr.strip(),
     }
 
-    if result.returncode != 0:
+    if outcome.returncode != 0:
         errors.append("OpenSCAD export failed; check stderr for details.")
         stl_path.unlink(missing_ok=True)
-        return {"errors": errors, "export": export_info}
+        return {"errors": errors, "export": export_info, **preview}
+
+    export_info["mesh"] = _finalize_stl(stl_path)
+    cache_key = _render_cache_key(render_cache, state.get("code", ""), openscad_path)
+    if render_cache and cache_key:
+        stl_path = render_cache.store(cache_key, stl_path)
+    if artifact_store is not None:
+        export_info["artifact"] = _publish_artifact(artifact_store, stl_path)
 
     return {
         "export": export_info,
         "stl_path": str(stl_path),
         "errors": errors,
+        **preview,
     }
 
 
-def _run_openscad_check(openscad_path: str, scad_path: Path) -> subprocess.CompletedProcess[str]:
-    """Attempt to validate generated code, falling back when --check is ambiguous."""
+def _discard_preview(state: GenerationState) -> GenerationState:
+    """Delete the progressive preview STL; returns the `preview` update without its path."""
 
-    result = subprocess.run(
-        [openscad_path, "--check", str(scad_path)],
-        check=False,
-        capture_output=True,
-        text=True,
+    preview = state.get("preview") or {}
+    if not preview.get("stl_path"):
+        return {}
+    Path(preview["stl_path"]).unlink(missing_ok=True)
+    return {"preview": {key: value for key, value in preview.items() if key != "stl_path"}}
+
+
+def _export(
+    state: GenerationState,
+    *,
+    openscad_path: str,
+    render_pool: RenderPool,
+    output_dir: Optional[str | Path],
+    render_cache: Optional[RenderCache] = None,
+    artifact_store: Optional[ArtifactStore] = None,
+) -> GenerationState:
+    early = _export_prepare(state, artifact_store=artifact_store)
+    if early is not None:
+        return early
+
+    scad_path = _write_scad(state.get("code", ""))
+    stl_path = _new_stl_path(output_dir)
+    try:
+        outcome: Any = _render_stl(render_pool, openscad_path, scad_path, stl_path)
+    except (FileNotFoundError, RenderLimitError) as exc:
+        outcome = exc
+    finally:
+        scad_path.unlink(missing_ok=True)
+
+    return _export_finish(
+        state,
+        outcome,
+        stl_path=stl_path,
+        openscad_path=openscad_path,
+        render_cache=render_cache,
+        artifact_store=artifact_store,
     )
 
-    stderr = result.stderr or ""
-    if result.returncode == 0 or "option '--check' is ambiguous" not in stderr:
-        return result
 
-    with tempfile.NamedTemporaryFile("w", suffix=".stl", delete=False) as tmp:
-        stl_path = Path(tmp.name)
+async def _aexport(
+    state: GenerationState,
+    *,
+    openscad_path: str,
+    render_pool: RenderPool,
+    output_dir: Optional[str | Path],
+    render_cache: Optional[RenderCache] = None,
+    artifact_store: Optional[ArtifactStore] = None,
+) -> GenerationState:
+    early = await asyncio.to_thread(_export_prepare, state, artifact_store=artifact_store)
+    if early is not None:
+        return early
 
+    scad_path = await _awrite_scad(state.get("code", ""))
+    stl_path = _new_stl_path(output_dir)
     try:
-        fallback = subprocess.run(
-            [openscad_path, "-o", str(stl_path), str(scad_path)],
-            check=False,
-            capture_output=True,
-            text=True,
-        )
+        outcome: Any = await _arender_stl(render_pool, openscad_path, scad_path, stl_path)
+    except (FileNotFoundError, RenderLimitError) as exc:
+        outcome = exc
     finally:
-        stl_path.unlink(missing_ok=True)
+        scad_path.unlink(missing_ok=True)
+
+    return await asyncio.to_thread(
+        _export_finish,
+        state,
+        outcome,
+        stl_path=stl_path,
+        openscad_path=openscad_path,
+        render_cache=render_cache,
+        artifact_store=artifact_store,
+    )
+
+
+def _render_cache_key(render_cache: Optional[RenderCache], code: str, openscad_path: str) -> Optional[str]:
+    if render_cache is None:
+        return None
+    capabilities = probe_openscad(openscad_path)
+    return render_cache.key(
+        code,
+        openscad_version=capabilities.version,
+        flags=("-o", "stl", "binary", *capabilities.render_flags),
+    )
+
+
+def _publish_artifact(artifact_store: ArtifactStore, stl_path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return artifact_store.publish(stl_path)
+    except OSError:
+        return None
+
+
+def _finalize_stl(stl_path: Path) -> Optional[Dict[str, Any]]:
+    """Rewrite a render as binary STL and return its mesh statistics."""
+
+    try:
+        return mesh_stats(convert_to_binary(stl_path))
+    except (ImportError, OSError, ValueError):
+        return None
+
+
+def _new_stl_path(output_dir: Optional[str | Path], *, preview: bool = False) -> Path:
+    export_dir = Path(output_dir) if output_dir else Path("outputs")
+    export_dir.mkdir(parents=True, exist_ok=True)
+    # Previews share the cache prefix so the render cache budget counts them
+    # until export deletes them.
+    kind = "preview_" if preview else ""
+    return export_dir / f"idea2solid_{kind}{uuid.uuid4().hex}.stl"
+
+
+def _preview_code(code: str, max_fn: int = PREVIEW_MAX_FN) -> str:
+    """Wrap every `$fn = <expr>` in `min(max_fn, <expr>)` for a coarse render.
+
+    `-D` overrides only replace top-level assignments, so `$fn` passed as a
+    module argument has to be capped in the source itself. Only code tokens
+    are rewritten, never comments or strings; code that does not tokenize is
+    returned unchanged for OpenSCAD to report.
+    """
+
+    try:
+        tokens = _tokenize(code)
+    except _ParseError:
+        return code
+
+    pieces: List[str] = []
+    position = 0
+    index = 0
+    while index < len(tokens) - 1:
+        if tokens[index].text != "$fn" or tokens[index + 1].text != "=":
+            index += 1
+            continue
+        index += 2
+        first = last = None
+        depth = 0
+        while index < len(tokens):
+            token = tokens[index]
+            if token.kind == "op":
+                if token.text in "([{":
+                    depth += 1
+                elif token.text in ")]}":
+                    if depth == 0:
+                        break
+                    depth -= 1
+                elif token.text in ",;" and depth == 0:
+                    break
+            first = first or token
+            last = token
+            index += 1
+        if first is None or last is None:
+            continue
+        end = last.start + len(last.text)
+        pieces.append(code[position:first.start])
+        pieces.append(f"min({max_fn}, {code[first.start:end]})")
+        position = end
+    pieces.append(code[position:])
+    return "".join(pieces)
+
+
+def _render_args(openscad_path: str, scad_path: Path, stl_path: Path, defines: Sequence[Tuple[str, str]]) -> List[str]:
+    args = [openscad_path, *probe_openscad(openscad_path).render_flags]
+    for name, value in defines:
+        args.extend(["-D", f"{name}={value}"])
+    return [*args, "-o", str(stl_path), str(scad_path)]
+
+
+def _render_stl(
+    render_pool: RenderPool,
+    openscad_path: str,
+    scad_path: Path,
+    stl_path: Path,
+    *,
+    defines: Sequence[Tuple[str, str]] = (),
+) -> subprocess.CompletedProcess[str]:
+    return render_pool.run(_render_args(openscad_path, scad_path, stl_path, defines))
+
+
+async def _arender_stl(
+    render_pool: RenderPool,
+    openscad_path: str,
+    scad_path: Path,
+    stl_path: Path,
+    *,
+    defines: Sequence[Tuple[str, str]] = (),
+) -> subprocess.CompletedProcess[str]:
+    return await render_pool.arun(_render_args(openscad_path, scad_path, stl_path, defines))
 
-    if fallback.returncode != 0 and not fallback.stderr:
-        fallback.stderr = stderr  # type: ignore[assignment]
 
-    return fallback
+def _check_args(openscad_path: str, scad_path: Path, output: Optional[Path]) -> List[str]:
+    if output is None:
+        return [openscad_path, "--check", str(scad_path)]
+    if output.suffix == ".stl":
+        return _render_args(openscad_path, scad_path, output, ())
+    return [openscad_path, "-o", str(output), str(scad_path)]
+
+
+def _check_output(openscad_path: str) -> Optional[Path]:
+    """Scratch output for the probed validation strategy (`None` for `--check`)."""
+
+    strategy = probe_openscad(openscad_path).validation
+    if strategy == "check":
+        return None
+    suffix = ".csg" if strategy == "csg" else ".stl"
+    handle_fd, handle_name = tempfile.mkstemp(suffix=suffix)
+    os.close(handle_fd)
+    return Path(handle_name)
+
+
+def _run_openscad_check(
+    render_pool: RenderPool,
+    openscad_path: str,
+    scad_path: Path,
+) -> subprocess.CompletedProcess[str]:
+    """Validate without exporting, using the cheapest strategy the binary supports."""
+
+    output = _check_output(openscad_path)
+    try:
+        return render_pool.run(_check_args(openscad_path, scad_path, output))
+    finally:
+        if output is not None:
+            output.unlink(missing_ok=True)
+
+
+async def _arun_openscad_check(
+    render_pool: RenderPool,
+    openscad_path: str,
+    scad_path: Path,
+) -> subprocess.CompletedProcess[str]:
+    output = _check_output(openscad_path)
+    try:
+        return await render_pool.arun(_check_args(openscad_path, scad_path, output))
+    finally:
+        if output is not None:
+            output.unlink(missing_ok=True)
+
+
+def _node(func: Any, afunc: Any) -> Any:
+    """Wrap sync and async node implementations so both invoke paths work."""
+
+    runnable_lambda = _lazy_import("langchain_core.runnables", "RunnableLambda")
+    return runnable_lambda(func, afunc=afunc)
 
 
 def build_generation_pipeline(
     vector_store: SnippetVectorStore,
     *,
     top_k: int = 5,
+    retrieval_mode: str = DEFAULT_RETRIEVAL_MODE,
+    context_budget: Optional[int] = None,
+    fetch_k: Optional[int] = None,
     model: str = DEFAULT_MODEL,
     temperature: float = 0.2,
     openscad_path: str = "openscad",
     output_dir: Optional[str | Path] = None,
+    compile_mode: str = "fused",
+    render_pool: Optional[RenderPool] = None,
+    render_cache: Optional[RenderCache | bool] = None,
+    response_cache: Optional[SemanticResponseCache] = None,
+    llm: Any = None,
+    max_attempts: Optional[int] = None,
+    repair_time_budget: Optional[float] = None,
+    prevalidate: bool = True,
+    candidates: Optional[int | Sequence[Mapping[str, Any]]] = None,
+    artifact_store: Optional[ArtifactStore] = None,
 ) -> Any:
-    """Create a LangGraph pipeline: ingest -> retrieve -> synthesize -> validate -> export."""
+    """Create a LangGraph pipeline: ingest -> retrieve -> synthesize -> validate (-> repair) -> export.
+
+    `retrieval_mode` selects `vector`, `lexical` (BM25, no embedding calls)
+    or `hybrid` snippet retrieval. Retrieval over-fetches `fetch_k` candidates
+    (default `2 * top_k`) and packs up to `top_k` of them, chosen by maximal
+    marginal relevance with comments trimmed, into `context_budget` tokens
+    (default `IDEA2SOLID_CONTEXT_TOKENS`, 0 for no limit); the rest are listed
+    in `dropped_snippets`. `compile_mode="fused"` validates by
+    rendering the final STL in a single OpenSCAD run that the export node
+    reuses; `"separate"` keeps a validation-only pass plus a second export render;
+    `"progressive"` validates with a coarse preview render (`PREVIEW_DEFINES`
+    plus `$fn` capped at `PREVIEW_MAX_FN`), reported as `preview` so clients
+    can show it while export renders the full-quality STL; export then
+    deletes the preview file.
+    OpenSCAD runs go through `render_pool`, by default the process-wide pool
+    from `get_default_render_pool()`. The binary is probed once with
+    `probe_openscad`: renders use the Manifold backend and binary STL output
+    when available, and validation-only runs use `--check`, a CSG export or a
+    render, whichever is cheapest. The probe is reported in `config["openscad"]`.
 
+    Renders are rewritten as binary STL, and the export payload carries
+    `mesh` statistics: bounding box, triangle count, surface area, volume and
+    watertightness.
+
+    With an `artifact_store`, every exported STL is also published under its
+    content hash (`export["artifact"]`) with precompressed siblings.
+
+    Successful renders are stored in a content-addressed `RenderCache` in the
+    output directory (sized by `IDEA2SOLID_RENDER_CACHE_MB`); pass
+    `render_cache=False` to always re-render.
+
+    With a `response_cache`, a `cache_lookup` node after ingest returns an
+    earlier successful result for a semantically near-identical question and
+    ends the run; otherwise `cache_store` records the new result after export.
+
+    The chat client (`llm`, default `ChatOpenAI(model, temperature)`) and the
+    system prompt with the cheat sheet are built once per compiled graph; the
+    per-request snippets and question follow that static prefix.
+
+    With `prevalidate`, `scad_lint.lint_scad` checks the code in-process
+    first (bracket balance, missing semicolons, unknown modules, `main()` never
+    called) and fails validation without spawning OpenSCAD.
+
+    `candidates` (default `IDEA2SOLID_CANDIDATES`, 1) enables speculative
+    generation: a `speculate` node replaces synthesize/validate and runs that
+    many candidates concurrently, each a count of samples or a list of
+    `{"model", "temperature"}` mappings. The first candidate to pass
+    validation is exported, the rest are cancelled, and `speculation` records
+    the winner and per-candidate timings. An injected `llm` serves every
+    candidate.
+
+    When OpenSCAD rejects the code, a `repair` node sends the model the
+    previous code and trimmed stderr (without re-running retrieval) and the
+    result is validated again, for up to `max_attempts` synthesis attempts in
+    total (default `IDEA2SOLID_MAX_ATTEMPTS`, 3) and only while the run is
+    younger than `repair_time_budget` seconds (`IDEA2SOLID_REPAIR_BUDGET`,
+    default 90). `max_attempts=1` disables repair.
+
+    Every node has a native async implementation, so the compiled graph can be
+    driven with `ainvoke`/`astream`: synthesis awaits `ChatOpenAI.ainvoke` and
+    OpenSCAD runs via `asyncio.create_subprocess_exec` in the same render pool.
+    """
+
+    check_retrieval_mode(retrieval_mode)
+    if compile_mode not in COMPILE_MODES:
+        raise ValueError(f"Unknown compile mode '{compile_mode}'; expected one of {', '.join(COMPILE_MODES)}.")
+    pool = render_pool or get_default_render_pool()
+    cache: Optional[RenderCache] = None
+    if isinstance(render_cache, RenderCache):
+        cache = render_cache
+    elif render_cache is None and default_render_cache_bytes() > 0:
+        cache = RenderCache(output_dir or "outputs")
+    # Probe once now rather than inside the event loop on the first request.
+    capabilities = probe_openscad(openscad_path)
     state_graph_cls, end_token = _get_langgraph_primitives()
 
+    if context_budget is None:
+        context_budget = default_context_budget()
+    fetch_k = fetch_k or 2 * top_k
+    retrieve_options = {
+        "vector_store": vector_store,
+        "top_k": top_k,
+        "retrieval_mode": retrieval_mode,
+        "context_budget": context_budget,
+        "fetch_k": fetch_k,
+        "model": model,
+    }
+    synthesizer = _Synthesizer(model=model, temperature=temperature, llm=llm)
+    synth_options = {"synthesizer": synthesizer}
+    if candidates is None:
+        candidates = int(os.getenv("IDEA2SOLID_CANDIDATES", "1"))
+    variants = _candidate_variants(candidates, model=model, temperature=temperature)
+    speculative = len(variants) > 1
+    if max_attempts is None:
+        max_attempts = int(os.getenv("IDEA2SOLID_MAX_ATTEMPTS", "3"))
+    if repair_time_budget is None:
+        repair_time_budget = float(os.getenv("IDEA2SOLID_REPAIR_BUDGET", "90"))
+    route_options = {"max_attempts": max_attempts, "time_budget": repair_time_budget}
+    validate_options = {
+        "openscad_path": openscad_path,
+        "render_pool": pool,
+        "compile_mode": compile_mode,
+        "output_dir": output_dir,
+        "render_cache": cache,
+        "prevalidate": prevalidate,
+    }
+    export_options = {
+        "openscad_path": openscad_path,
+        "render_pool": pool,
+        "output_dir": output_dir,
+        "render_cache": cache,
+        "artifact_store": artifact_store,
+    }
+    speculate_options = {
+        "synthesizers": [
+            synthesizer
+            if (variant["model"], variant["temperature"]) == (model, temperature)
+            else _Synthesizer(llm=llm, **variant)
+            for variant in variants
+        ],
+        "validate_options": validate_options,
+    }
+
     graph = state_graph_cls(GenerationState)
     graph.add_node("ingest", lambda state: _ingest(state))
     graph.add_node(
         "retrieve",
-        lambda state: _retrieve(state, vector_store=vector_store, top_k=top_k),
-    )
-    graph.add_node(
-        "synthesize",
-        lambda state: _synthesize(state, model=model, temperature=temperature),
-    )
-    graph.add_node(
-        "validate",
-        lambda state: _validate(state, openscad_path=openscad_path),
+        _node(
+            lambda state: _retrieve(state, **retrieve_options),
+            lambda state: asyncio.to_thread(_retrieve, state, **retrieve_options),
+        ),
     )
+    if speculative:
+        graph.add_node(
+            "speculate",
+            _node(
+                lambda state: _speculate(state, **speculate_options),
+                lambda state: _aspeculate(state, **speculate_options),
+            ),
+        )
+    else:
+        graph.add_node(
+            "synthesize",
+            _node(
+                lambda state: _synthesize(state, **synth_options),
+                lambda state: _asynthesize(state, **synth_options),
+            ),
+        )
+    if not speculative or max_attempts > 1:
+        graph.add_node(
+            "validate",
+            _node(
+                lambda state: _validate(state, **validate_options),
+                lambda state: _avalidate(state, **validate_options),
+            ),
+        )
     graph.add_node(
         "export",
-        lambda state: _export(
-            state,
-            openscad_path=openscad_path,
-            output_dir=output_dir,
+        _node(
+            lambda state: _export(state, **export_options),
+            lambda state: _aexport(state, **export_options),
         ),
     )
 
     graph.set_entry_point("ingest")
-    graph.add_edge("ingest", "retrieve")
-    graph.add_edge("retrieve", "synthesize")
-    graph.add_edge("synthesize", "validate")
-    graph.add_edge("validate", "export")
-    graph.add_edge("export", end_token)
+    if response_cache is not None:
+        graph.add_node(
+            "cache_lookup",
+            _node(
+                lambda state: _cache_lookup(state, response_cache=response_cache),
+                lambda state: asyncio.to_thread(_cache_lookup, state, response_cache=response_cache),
+            ),
+        )
+        graph.add_node(
+            "cache_store",
+            _node(
+                lambda state: _cache_store(state, response_cache=response_cache),
+                lambda state: asyncio.to_thread(_cache_store, state, response_cache=response_cache),
+            ),
+        )
+        graph.add_edge("ingest", "cache_lookup")
+        graph.add_conditional_edges(
+            "cache_lookup",
+            _route_cache_lookup,
+            {"hit": end_token, "miss": "retrieve"},
+        )
+    else:
+        graph.add_edge("ingest", "retrieve")
+    # Speculation validates its own candidates, so it stands in for validate.
+    checked = "speculate" if speculative else "validate"
+    if speculative:
+        graph.add_edge("retrieve", "speculate")
+    else:
+        graph.add_edge("retrieve", "synthesize")
+        graph.add_edge("synthesize", "validate")
+    if max_attempts > 1:
+        graph.add_node(
+            "repair",
+            _node(
+                lambda state: _repair(state, **synth_options),
+                lambda state: _arepair(state, **synth_options),
+            ),
+        )
+        route = functools.partial(_route_validation, **route_options)
+        graph.add_conditional_edges(checked, route, {"repair": "repair", "export": "export"})
+        if speculative:
+            graph.add_conditional_edges("validate", route, {"repair": "repair", "export": "export"})
+        graph.add_edge("repair", "validate")
+    else:
+        graph.add_edge(checked, "export")
+    if response_cache is not None:
+        graph.add_edge("export", "cache_store")
+        graph.add_edge("cache_store", end_token)
+    else:
+        graph.add_edge("export", end_token)
 
     compiled = graph.compile()
     compiled.config = {  # type: ignore[attr-defined]
         "top_k": top_k,
+        "retrieval_mode": retrieval_mode,
+        "context_budget": context_budget,
+        "fetch_k": fetch_k,
         "model": model,
         "temperature": temperature,
+        "candidates": variants,
+        "max_attempts": max_attempts,
+        "repair_time_budget": repair_time_budget,
         "openscad_path": openscad_path,
+        "openscad": capabilities.as_dict(),
         "output_dir": str(output_dir) if output_dir else None,
+        "compile_mode": compile_mode,
+        "prevalidate": prevalidate,
+        "render_concurrency": pool.max_workers,
+        "render_cache": str(cache.directory) if cache else None,
+        "response_cache": response_cache.threshold if response_cache else None,
+        "artifacts": str(artifact_store.directory) if artifact_store else None,
     }
     return compiled
 
@@ -0,0 +1,105 @@
+"""Content-addressed cache of rendered STL artifacts."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+
+def normalize_scad(code: str) -> str:
+    """Canonical form of a script for hashing: LF endings, no trailing blanks."""
+
+    lines = code.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+
+def default_render_cache_bytes() -> int:
+    """Cache budget from `IDEA2SOLID_RENDER_CACHE_MB` (default 1024 MB, 0 disables)."""
+
+    return int(float(os.getenv("IDEA2SOLID_RENDER_CACHE_MB", "1024")) * 1024 * 1024)
+
+
+class RenderCache:
+    """Store STL exports under a hash of their normalized source.
+
+    The key covers the normalized OpenSCAD code, the OpenSCAD version and the
+    export flags, so a cache hit is byte-for-byte what a fresh render would
+    produce. Files in `directory` matching `<prefix>*.stl` are evicted least
+    recently used first once their total size exceeds `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        *,
+        max_bytes: Optional[int] = None,
+        prefix: str = "idea2solid_",
+    ) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = default_render_cache_bytes() if max_bytes is None else max_bytes
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def key(self, code: str, *, openscad_version: str, flags: Sequence[str] = ()) -> str:
+        digest = hashlib.sha256()
+        for part in (normalize_scad(code), openscad_version, "\0".join(flags)):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def path_for(self, key: str) -> Path:
+        return self.directory / f"{self.prefix}{key}.stl"
+
+    def lookup(self, key: str) -> Optional[Path]:
+        """Return the cached artifact for `key`, marking it recently used."""
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+        with self._lock:
+            self._stats["hits"] += 1
+        return path
+
+    def store(self, key: str, rendered: Path) -> Path:
+        """Move a freshly rendered STL into the cache and enforce the size budget."""
+        target = self.path_for(key)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        os.replace(rendered, target)
+        with self._lock:
+            self._stats["stores"] += 1
+        self.evict(keep=target)
+        return target
+
+    def evict(self, *, keep: Optional[Path] = None) -> None:
+        entries = []
+        for path in self.directory.glob(f"{self.prefix}*.stl"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        removed = 0
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            if keep is not None and path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        with self._lock:
+            self._stats["evictions"] += removed
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
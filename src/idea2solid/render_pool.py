@@ -0,0 +1,391 @@
+"""Bounded, FIFO-fair executor for OpenSCAD subprocesses."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, List, Optional, Sequence
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows has no rlimits
+    resource = None  # type: ignore[assignment]
+
+_MEMORY_MARKERS = ("bad_alloc", "out of memory", "cannot allocate memory")
+
+
+def default_render_concurrency() -> int:
+    """Concurrent render limit from `IDEA2SOLID_RENDER_CONCURRENCY`, else the core count."""
+
+    raw = os.getenv("IDEA2SOLID_RENDER_CONCURRENCY", "").strip()
+    if raw:
+        return max(1, int(raw))
+    return max(1, os.cpu_count() or 1)
+
+
+def _env_number(name: str, default: Optional[float]) -> Optional[float]:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    value = float(raw)
+    return value if value > 0 else None
+
+
+@dataclass(frozen=True)
+class RenderLimits:
+    """Wall-clock timeout plus optional CPU-time and address-space rlimits."""
+
+    timeout: Optional[float] = 120.0
+    cpu_seconds: Optional[int] = None
+    memory_mb: Optional[int] = None
+
+    @classmethod
+    def from_env(cls) -> "RenderLimits":
+        """Read `IDEA2SOLID_RENDER_TIMEOUT`/`_CPU_SECONDS`/`_MEMORY_MB` (0 disables)."""
+        cpu = _env_number("IDEA2SOLID_RENDER_CPU_SECONDS", None)
+        memory = _env_number("IDEA2SOLID_RENDER_MEMORY_MB", None)
+        return cls(
+            timeout=_env_number("IDEA2SOLID_RENDER_TIMEOUT", 120.0),
+            cpu_seconds=int(cpu) if cpu else None,
+            memory_mb=int(memory) if memory else None,
+        )
+
+
+class RenderLimitError(RuntimeError):
+    """An OpenSCAD process was stopped by a `RenderLimits` guard."""
+
+    status = "resource_exceeded"
+
+    def __init__(self, message: str, *, stdout: str = "", stderr: str = "") -> None:
+        super().__init__(message)
+        self.stdout = stdout
+        self.stderr = stderr
+
+
+class RenderTimeoutError(RenderLimitError):
+    status = "timeout"
+
+
+def _rlimit_pairs(limits: RenderLimits) -> List[tuple]:
+    if resource is None:
+        return []
+    pairs = []
+    if limits.cpu_seconds:
+        pairs.append((resource.RLIMIT_CPU, (limits.cpu_seconds, limits.cpu_seconds + 5)))
+    if limits.memory_mb:
+        size = limits.memory_mb * 1024 * 1024
+        pairs.append((resource.RLIMIT_AS, (size, size)))
+    return pairs
+
+
+def _preexec_for(limits: RenderLimits) -> Optional[Callable[[], None]]:
+    pairs = _rlimit_pairs(limits)
+    if not pairs or hasattr(resource, "prlimit"):
+        return None
+
+    def apply_limits() -> None:  # pragma: no cover - runs in the child process
+        for kind, value in pairs:
+            resource.setrlimit(kind, value)
+
+    return apply_limits
+
+
+def _exceeded_resources(result: subprocess.CompletedProcess, limits: RenderLimits) -> bool:
+    if limits.cpu_seconds and result.returncode in (-getattr(signal, "SIGXCPU", 0), -signal.SIGKILL):
+        return True
+    if limits.memory_mb and result.returncode != 0:
+        stderr = (result.stderr or "").lower()
+        return any(marker in stderr for marker in _MEMORY_MARKERS)
+    return False
+
+
+def _spawn_options(limits: RenderLimits) -> Dict[str, Any]:
+    options: Dict[str, Any] = {}
+    if os.name == "posix":
+        options["start_new_session"] = True
+        preexec = _preexec_for(limits)
+        if preexec is not None:
+            options["preexec_fn"] = preexec
+    return options
+
+
+def _apply_prlimits(pid: int, limits: RenderLimits, options: Dict[str, Any]) -> None:
+    if "preexec_fn" in options:
+        return
+    # Linux: apply limits from the parent, avoiding preexec_fn in threaded servers.
+    for kind, value in _rlimit_pairs(limits):
+        try:
+            resource.prlimit(pid, kind, value)
+        except (ProcessLookupError, OSError):
+            break
+
+
+def _kill_pid_group(pid: int) -> None:
+    try:
+        if os.name == "posix":
+            os.killpg(pid, signal.SIGKILL)
+        else:  # pragma: no cover
+            os.kill(pid, signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _checked_result(
+    args: List[str],
+    returncode: int,
+    stdout: str,
+    stderr: str,
+    limits: RenderLimits,
+) -> subprocess.CompletedProcess[str]:
+    result = subprocess.CompletedProcess(args, returncode, stdout, stderr)
+    if _exceeded_resources(result, limits):
+        raise RenderLimitError(
+            "OpenSCAD exceeded its CPU or memory limit.",
+            stdout=(stdout or "").strip(),
+            stderr=(stderr or "").strip(),
+        )
+    return result
+
+
+def _timeout_error(limits: RenderLimits, stdout: str = "", stderr: str = "") -> RenderTimeoutError:
+    return RenderTimeoutError(
+        f"OpenSCAD exceeded the {limits.timeout:g}s render timeout.",
+        stdout=(stdout or "").strip(),
+        stderr=(stderr or "").strip(),
+    )
+
+
+def run_limited(args: List[str], limits: RenderLimits) -> subprocess.CompletedProcess[str]:
+    """Run a command in its own process group under `limits`.
+
+    Raises `RenderTimeoutError` after killing the whole group when the
+    timeout elapses, and `RenderLimitError` when an rlimit stopped it.
+    """
+
+    options = _spawn_options(limits)
+    process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, **options)
+    _apply_prlimits(process.pid, limits, options)
+
+    try:
+        stdout, stderr = process.communicate(timeout=limits.timeout)
+    except subprocess.TimeoutExpired:
+        _kill_pid_group(process.pid)
+        stdout, stderr = process.communicate()
+        raise _timeout_error(limits, stdout, stderr) from None
+    finally:
+        if process.poll() is None:  # pragma: no cover - interrupted communicate()
+            _kill_pid_group(process.pid)
+            process.wait()
+
+    return _checked_result(args, process.returncode, stdout, stderr, limits)
+
+
+async def arun_limited(args: List[str], limits: RenderLimits) -> subprocess.CompletedProcess[str]:
+    """Async counterpart of `run_limited` built on `asyncio.create_subprocess_exec`.
+
+    Cancelling the awaiting task kills the process group as well.
+    """
+
+    options = _spawn_options(limits)
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        **options,
+    )
+    _apply_prlimits(process.pid, limits, options)
+
+    try:
+        stdout_bytes, stderr_bytes = await asyncio.wait_for(process.communicate(), timeout=limits.timeout)
+    except asyncio.TimeoutError:
+        _kill_pid_group(process.pid)
+        await process.wait()
+        raise _timeout_error(limits) from None
+    finally:
+        if process.returncode is None:
+            _kill_pid_group(process.pid)
+
+    stdout = stdout_bytes.decode("utf-8", errors="replace")
+    stderr = stderr_bytes.decode("utf-8", errors="replace")
+    return _checked_result(args, process.returncode, stdout, stderr, limits)
+
+
+def _percentile(samples: Sequence[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class RenderPool:
+    """Limit concurrent OpenSCAD processes and queue the rest in arrival order.
+
+    Callers block in `slot()` (or `run()`) until one of `max_workers` slots
+    is free. Queue depth and wait/run times are exposed via `metrics()`.
+    Every process started by `run()` is subject to `limits`.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        *,
+        limits: Optional[RenderLimits] = None,
+        sample_size: int = 512,
+    ) -> None:
+        self.max_workers = max_workers or default_render_concurrency()
+        self.limits = limits or RenderLimits.from_env()
+        self._lock = threading.Lock()
+        self._waiters: Deque[Callable[[], None]] = deque()
+        self._active = 0
+        self._completed = 0
+        self._peak_queue = 0
+        self._limit_failures = {"timeout": 0, "resource_exceeded": 0}
+        self._wait_samples: Deque[float] = deque(maxlen=sample_size)
+        self._run_samples: Deque[float] = deque(maxlen=sample_size)
+
+    def _try_acquire(self, grant: Callable[[], None]) -> bool:
+        """Take a free slot, or queue `grant` to be called when one is handed over."""
+        with self._lock:
+            if self._active < self.max_workers and not self._waiters:
+                self._active += 1
+                return True
+            self._waiters.append(grant)
+            self._peak_queue = max(self._peak_queue, len(self._waiters))
+            return False
+
+    def _release(self) -> None:
+        with self._lock:
+            if self._waiters:
+                # Hand the slot straight to the oldest waiter, keeping FIFO order.
+                grant = self._waiters.popleft()
+            else:
+                self._active -= 1
+                return
+        grant()
+
+    def _record(self, queued_at: float, started_at: float) -> None:
+        finished_at = time.perf_counter()
+        with self._lock:
+            self._completed += 1
+            self._wait_samples.append(started_at - queued_at)
+            self._run_samples.append(finished_at - started_at)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold one render slot for the duration of the block."""
+        queued_at = time.perf_counter()
+        granted = threading.Event()
+        if not self._try_acquire(granted.set):
+            granted.wait()
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(queued_at, started_at)
+            self._release()
+
+    @asynccontextmanager
+    async def async_slot(self) -> AsyncIterator[None]:
+        """Async `slot()`: waits on the event loop and shares the same FIFO queue."""
+        queued_at = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+
+        def resolve() -> None:
+            if future.cancelled():
+                self._release()  # the waiter gave up; pass the slot on
+            else:
+                future.set_result(None)
+
+        def grant() -> None:
+            loop.call_soon_threadsafe(resolve)
+
+        if not self._try_acquire(grant):
+            try:
+                await future
+            except asyncio.CancelledError:
+                with self._lock:
+                    queued = grant in self._waiters
+                    if queued:
+                        self._waiters.remove(grant)
+                if not queued and future.done() and not future.cancelled():
+                    self._release()
+                raise
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(queued_at, started_at)
+            self._release()
+
+    def run(self, args: List[str], *, limits: Optional[RenderLimits] = None) -> subprocess.CompletedProcess[str]:
+        """Run an OpenSCAD command under the pool's limits once a slot is free."""
+        with self.slot():
+            try:
+                return run_limited(args, limits or self.limits)
+            except RenderLimitError as exc:
+                with self._lock:
+                    self._limit_failures[exc.status] += 1
+                raise
+
+    async def arun(
+        self,
+        args: List[str],
+        *,
+        limits: Optional[RenderLimits] = None,
+    ) -> subprocess.CompletedProcess[str]:
+        """Async `run()` using `asyncio.create_subprocess_exec`."""
+        async with self.async_slot():
+            try:
+                return await arun_limited(args, limits or self.limits)
+            except RenderLimitError as exc:
+                with self._lock:
+                    self._limit_failures[exc.status] += 1
+                raise
+
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of concurrency, queue depth and wait/run latency (ms)."""
+        with self._lock:
+            waits = list(self._wait_samples)
+            runs = list(self._run_samples)
+            snapshot = {
+                "max_workers": self.max_workers,
+                "active": self._active,
+                "queued": len(self._waiters),
+                "peak_queued": self._peak_queue,
+                "completed": self._completed,
+                "timeouts": self._limit_failures["timeout"],
+                "resource_exceeded": self._limit_failures["resource_exceeded"],
+            }
+        snapshot.update(
+            {
+                "wait_ms_p50": round(_percentile(waits, 0.5) * 1000, 2),
+                "wait_ms_p95": round(_percentile(waits, 0.95) * 1000, 2),
+                "wait_ms_max": round(max(waits, default=0.0) * 1000, 2),
+                "run_ms_p50": round(_percentile(runs, 0.5) * 1000, 2),
+                "run_ms_p95": round(_percentile(runs, 0.95) * 1000, 2),
+            }
+        )
+        return snapshot
+
+
+_default_pool: Optional[RenderPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_render_pool() -> RenderPool:
+    """Process-wide pool shared by every pipeline that is not given its own."""
+
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = RenderPool()
+        return _default_pool
@@ -0,0 +1,168 @@
+"""Semantic cache of whole-pipeline results for near-duplicate prompts."""
+
+from __future__ import annotations
+
+import copy
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from importlib import import_module
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+_CACHED_FIELDS = ("code", "validation", "export", "stl_path", "snippets")
+_MEASUREMENT_RE = re.compile(
+    r"(?<![\d.])(?P<number>\d+(?:\.\d+)?|\.\d+)(?![\d.])"
+    r"(?:\s*(?P<unit>millimet(?:er|re)s?|centimet(?:er|re)s?|met(?:er|re)s?|inch(?:es)?|degrees?"
+    r"|deg|mm|cm|in|m|\"|°|%)(?![a-z]))?",
+    re.IGNORECASE,
+)
+_UNIT_ALIASES = {
+    "millimeter": "mm", "millimetre": "mm", "centimeter": "cm", "centimetre": "cm", "meter": "m",
+    "metre": "m", "inch": "in", "inche": "in", '"': "in", "degree": "deg", "°": "deg",
+}
+
+
+@dataclass
+class _Entry:
+    question: str
+    vector: Any
+    measurements: Tuple[str, ...]
+    result: Dict[str, Any]
+    created_at: float
+
+
+def measurements(question: str) -> Tuple[str, ...]:
+    """Numbers in `question` with their units, normalized (`"50 mm"` -> `"50mm"`).
+
+    Embeddings barely separate "a 50mm cube" from "a 60mm cube", so cache
+    hits additionally require these to match exactly.
+    """
+
+    found = []
+    for match in _MEASUREMENT_RE.finditer(question):
+        number = f"{float(match.group('number')):g}"
+        unit = (match.group("unit") or "").lower().rstrip("s")
+        found.append(number + _UNIT_ALIASES.get(unit, unit))
+    return tuple(found)
+
+
+def is_cacheable(result: Dict[str, Any]) -> bool:
+    """Only runs that validated, exported and reported no errors are reused."""
+
+    return (
+        (result.get("validation") or {}).get("status") == "passed"
+        and (result.get("export") or {}).get("status") == "success"
+        and bool(result.get("stl_path"))
+        and not result.get("errors")
+    )
+
+
+class SemanticResponseCache:
+    """Return earlier pipeline results for prompts whose embeddings are close.
+
+    A lookup embeds the question and compares it by cosine similarity with
+    the live entries whose numbers and units (see `measurements`) are the
+    same; the best match at or above `threshold` is a hit.
+    Entries expire after `ttl_seconds` and the least recently used entry is
+    dropped beyond `max_entries`. Hits whose STL file disappeared are purged.
+    """
+
+    def __init__(
+        self,
+        embeddings: Any,
+        *,
+        threshold: float = 0.95,
+        ttl_seconds: float = 3600.0,
+        max_entries: int = 256,
+    ) -> None:
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._next_id = 0
+        self._matrix: Optional[Tuple[List[int], Any]] = None
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0}
+
+    @classmethod
+    def from_env(cls, embeddings: Any) -> "SemanticResponseCache":
+        """Configure from `IDEA2SOLID_RESPONSE_CACHE_THRESHOLD`/`_TTL`/`_SIZE`."""
+        return cls(
+            embeddings,
+            threshold=float(os.getenv("IDEA2SOLID_RESPONSE_CACHE_THRESHOLD", "0.95")),
+            ttl_seconds=float(os.getenv("IDEA2SOLID_RESPONSE_CACHE_TTL", "3600")),
+            max_entries=int(os.getenv("IDEA2SOLID_RESPONSE_CACHE_SIZE", "256")),
+        )
+
+    def _unit_vector(self, question: str) -> Any:
+        numpy = import_module("numpy")
+        vector = numpy.asarray(self.embeddings.embed_query(question), dtype=numpy.float32)
+        norm = numpy.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _expire(self, now: float) -> None:
+        stale = [key for key, entry in self._entries.items() if now - entry.created_at > self.ttl_seconds]
+        for key in stale:
+            del self._entries[key]
+        if stale:
+            self._matrix = None
+
+    def _stacked(self) -> Tuple[List[int], Any]:
+        if self._matrix is None:
+            numpy = import_module("numpy")
+            keys = list(self._entries)
+            vectors = [self._entries[key].vector for key in keys]
+            self._matrix = (keys, numpy.stack(vectors) if vectors else None)
+        return self._matrix
+
+    def lookup(self, question: str) -> Optional[Tuple[Dict[str, Any], float, str]]:
+        """Return `(result, similarity, cached_question)` for the closest hit."""
+        vector = self._unit_vector(question)
+        wanted = measurements(question)
+        with self._lock:
+            self._expire(time.time())
+            keys, matrix = self._stacked()
+            comparable = [index for index, key in enumerate(keys) if self._entries[key].measurements == wanted]
+            if matrix is None or not comparable:
+                self._stats["misses"] += 1
+                return None
+            similarities = matrix[comparable] @ vector
+            best = int(similarities.argmax())
+            similarity = float(similarities[best])
+            key = keys[comparable[best]]
+            entry = self._entries[key]
+            if similarity < self.threshold:
+                self._stats["misses"] += 1
+                return None
+            if not Path(entry.result["stl_path"]).exists():
+                del self._entries[key]
+                self._matrix = None
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return copy.deepcopy(entry.result), similarity, entry.question
+
+    def store(self, question: str, result: Dict[str, Any]) -> bool:
+        """Remember a successful run; returns False when it is not cacheable."""
+        if not is_cacheable(result):
+            return False
+        payload = {name: copy.deepcopy(result.get(name)) for name in _CACHED_FIELDS}
+        vector = self._unit_vector(question)
+        with self._lock:
+            self._entries[self._next_id] = _Entry(question, vector, measurements(question), payload, time.time())
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+            self._stats["stores"] += 1
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries)}
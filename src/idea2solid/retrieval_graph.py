@@ -5,7 +5,7 @@ from __future__ import annotations
 from importlib import import_module
 from typing import Any, Dict, List, Sequence, TypedDict
 
-from .vector_store import SnippetVectorStore
+from .vector_store import DEFAULT_RETRIEVAL_MODE, SnippetVectorStore, check_retrieval_mode
 
 
 class RetrievalState(TypedDict, total=False):
@@ -42,16 +42,22 @@ def build_retrieval_graph(
     vector_store: SnippetVectorStore,
     *,
     top_k: int = 5,
+    retrieval_mode: str = DEFAULT_RETRIEVAL_MODE,
 ) -> Any:
-    """Construct a LangGraph that retrieves snippets for a question."""
+    """Construct a LangGraph that retrieves snippets for a question.
+
+    `retrieval_mode` is one of `vector`, `lexical` or `hybrid`.
+    """
+
+    check_retrieval_mode(retrieval_mode)
 
     def retrieve_snippets(state: RetrievalState) -> RetrievalState:
         question = state.get("question")
         if not question:
             raise ValueError("Retrieval graph requires 'question' in the state.")
 
-        raw_results: Sequence[Any] = vector_store.similarity_search_with_score(
-            question, k=top_k
+        raw_results: Sequence[Any] = vector_store.search(
+            question, k=top_k, mode=retrieval_mode
         )
         formatted = []
         context_blocks = []
@@ -0,0 +1,439 @@
+"""Fast in-process syntax checks for generated OpenSCAD code.
+
+`lint_scad` tokenizes the script and parses it with a small recursive-descent
+parser for the OpenSCAD statement and expression grammar. It reports the
+problems that make a render pointless — unbalanced brackets, missing
+semicolons, calls to modules that are neither built in nor defined, and a
+`main` module that is never instantiated — without spawning OpenSCAD. It is
+deliberately permissive about anything else; OpenSCAD stays the authority.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Set
+
+BUILTIN_MODULES = frozenset(
+    {
+        # 3D and 2D primitives
+        "cube", "sphere", "cylinder", "polyhedron", "square", "circle", "polygon", "text",
+        "import", "surface",
+        # transformations
+        "translate", "rotate", "scale", "resize", "mirror", "multmatrix", "color", "offset",
+        "hull", "minkowski", "fill", "roof",
+        # boolean operations and extrusion
+        "union", "difference", "intersection", "linear_extrude", "rotate_extrude", "projection",
+        "render",
+        # flow control and utilities
+        "children", "echo", "assert", "for", "intersection_for", "if", "let", "assign", "group",
+    }
+)
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<space>[ \t\r\f\v]+)
+  | (?P<newline>\n)
+  | (?P<line_comment>//[^\n]*)
+  | (?P<block_comment>/\*.*?\*/)
+  | (?P<unterminated_comment>/\*)
+  | (?P<string>"(?:\\.|[^"\\\n])*")
+  | (?P<unterminated_string>")
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<ident>\$?[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<op>==|!=|<=|>=|&&|\|\||[-+*/%^!<>=?:;,.#(){}\[\]])
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+_USE_RE = re.compile(r"(use|include)\s*<[^>\n]*>")
+_PAIRS = {")": "(", "]": "[", "}": "{"}
+
+
+@dataclass(frozen=True)
+class _Token:
+    kind: str
+    text: str
+    line: int
+    start: int = 0
+
+
+class _ParseError(Exception):
+    def __init__(self, line: int, message: str) -> None:
+        super().__init__(message)
+        self.line = line
+        self.message = message
+
+
+def _tokenize(code: str) -> List[_Token]:
+    tokens: List[_Token] = []
+    line = 1
+    position = 0
+    while position < len(code):
+        use = _USE_RE.match(code, position)
+        if use:
+            tokens.append(_Token("use", use.group(0), line, position))
+            position = use.end()
+            continue
+        match = _TOKEN_RE.match(code, position)
+        if match is None:
+            raise _ParseError(line, f"unexpected character {code[position]!r}")
+        kind = match.lastgroup or ""
+        text = match.group(0)
+        if kind == "unterminated_comment":
+            raise _ParseError(line, "unterminated block comment")
+        if kind == "unterminated_string":
+            raise _ParseError(line, "unterminated string literal")
+        if kind in {"ident", "number", "string", "op"}:
+            tokens.append(_Token(kind, text, line, position))
+        line += text.count("\n")
+        position = match.end()
+    return tokens
+
+
+def _check_balance(tokens: List[_Token]) -> Optional[_ParseError]:
+    stack: List[_Token] = []
+    for token in tokens:
+        if token.kind != "op":
+            continue
+        if token.text in "([{":
+            stack.append(token)
+        elif token.text in _PAIRS:
+            if not stack:
+                return _ParseError(token.line, f"unexpected '{token.text}' with no matching '{_PAIRS[token.text]}'")
+            opener = stack.pop()
+            if opener.text != _PAIRS[token.text]:
+                return _ParseError(
+                    token.line,
+                    f"'{token.text}' does not match '{opener.text}' opened on line {opener.line}",
+                )
+    if stack:
+        opener = stack[-1]
+        return _ParseError(opener.line, f"'{opener.text}' is never closed")
+    return None
+
+
+class _Parser:
+    def __init__(self, tokens: List[_Token]) -> None:
+        self.tokens = tokens
+        self.position = 0
+        self.defined_modules: Set[str] = set()
+        self.calls: List[_Token] = []
+        self.calls_outside_modules: Set[str] = set()
+        self.uses_libraries = False
+        self._module_depth = 0
+
+    # -- token helpers -------------------------------------------------
+    def peek(self, offset: int = 0) -> Optional[_Token]:
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else None
+
+    def at(self, text: str, offset: int = 0) -> bool:
+        token = self.peek(offset)
+        return token is not None and token.kind in {"op", "ident"} and token.text == text
+
+    def line(self) -> int:
+        token = self.peek() or (self.tokens[-1] if self.tokens else None)
+        return token.line if token else 1
+
+    def advance(self) -> _Token:
+        token = self.peek()
+        if token is None:
+            raise _ParseError(self.line(), "unexpected end of file")
+        self.position += 1
+        return token
+
+    def expect(self, text: str, context: str) -> _Token:
+        if not self.at(text):
+            token = self.peek()
+            found = f"'{token.text}'" if token else "end of file"
+            raise _ParseError(self.line(), f"expected '{text}' {context}, found {found}")
+        return self.advance()
+
+    def identifier(self, context: str) -> _Token:
+        token = self.peek()
+        if token is None or token.kind != "ident":
+            found = f"'{token.text}'" if token else "end of file"
+            raise _ParseError(self.line(), f"expected a name {context}, found {found}")
+        return self.advance()
+
+    # -- statements ----------------------------------------------------
+    def program(self) -> None:
+        while self.peek() is not None:
+            self.statement()
+
+    def statement(self) -> None:
+        token = self.peek()
+        assert token is not None
+        if token.kind == "use":
+            self.uses_libraries = True
+            self.advance()
+        elif self.at(";"):
+            self.advance()
+        elif self.at("{"):
+            self.block()
+        elif self.at("module"):
+            self.module_definition()
+        elif self.at("function") and not self.at("(", 1):
+            self.function_definition()
+        elif token.kind == "ident" and self.at("=", 1):
+            self.advance()
+            self.advance()
+            self.expression()
+            self.expect(";", f"after the assignment to '{token.text}'")
+        else:
+            self.instantiation()
+
+    def block(self) -> None:
+        self.expect("{", "to open a block")
+        while not self.at("}"):
+            if self.peek() is None:
+                raise _ParseError(self.line(), "unexpected end of file inside a block")
+            self.statement()
+        self.advance()
+
+    def module_definition(self) -> None:
+        self.advance()
+        name = self.identifier("after 'module'")
+        self.defined_modules.add(name.text)
+        self.expect("(", f"after 'module {name.text}'")
+        self.parameters()
+        self.expect(")", f"to close the parameters of module '{name.text}'")
+        self._module_depth += 1
+        self.child()
+        self._module_depth -= 1
+
+    def function_definition(self) -> None:
+        self.advance()
+        name = self.identifier("after 'function'")
+        self.expect("(", f"after 'function {name.text}'")
+        self.parameters()
+        self.expect(")", f"to close the parameters of function '{name.text}'")
+        self.expect("=", f"in the definition of function '{name.text}'")
+        self.expression()
+        self.expect(";", f"after the definition of function '{name.text}'")
+
+    def parameters(self) -> None:
+        while not self.at(")"):
+            self.identifier("in the parameter list")
+            if self.at("="):
+                self.advance()
+                self.expression()
+            if not self.at(","):
+                break
+            self.advance()
+
+    def instantiation(self) -> None:
+        while self.peek() is not None and self.peek().text in {"!", "#", "%", "*"}:  # type: ignore[union-attr]
+            self.advance()
+        token = self.peek()
+        if token is None or token.kind != "ident":
+            found = f"'{token.text}'" if token else "end of file"
+            raise _ParseError(self.line(), f"expected a statement, found {found}")
+        if token.text == "if":
+            self.advance()
+            self.expect("(", "after 'if'")
+            self.expression()
+            self.expect(")", "to close the 'if' condition")
+            self.child()
+            if self.at("else"):
+                self.advance()
+                self.child()
+            return
+        self.advance()
+        if not self.at("("):
+            if self.at("="):
+                raise _ParseError(token.line, f"unexpected '=' after '{token.text}'")
+            raise _ParseError(token.line, f"expected '(' after '{token.text}' or a missing ';' before it")
+        self.calls.append(token)
+        if self._module_depth == 0:
+            self.calls_outside_modules.add(token.text)
+        self.advance()
+        self.arguments(")")
+        self.expect(")", f"to close the arguments of '{token.text}'")
+        self.child(after=token.text)
+
+    def child(self, after: Optional[str] = None) -> None:
+        if self.at(";"):
+            self.advance()
+        elif self.at("{"):
+            self.block()
+        else:
+            token = self.peek()
+            if token is None or not (token.kind == "ident" or token.text in {"!", "#", "%", "*"}):
+                found = f"'{token.text}'" if token else "end of file"
+                where = f"after '{after}(...)'" if after else "here"
+                raise _ParseError(self.line(), f"missing ';' {where}, found {found}")
+            if token.kind == "ident" and self.at("=", 1):
+                raise _ParseError(token.line, f"missing ';' after '{after}(...)'" if after else "unexpected assignment")
+            self.instantiation()
+
+    def arguments(self, closer: str) -> None:
+        while not self.at(closer):
+            token = self.peek()
+            if token is not None and token.kind == "ident" and self.at("=", 1):
+                self.advance()
+                self.advance()
+            self.expression()
+            if self.at(";"):
+                # C-style list comprehension: for (init; condition; update)
+                self.advance()
+                self.expression()
+                self.expect(";", "in the 'for' header")
+                continue
+            if not self.at(","):
+                break
+            self.advance()
+
+    # -- expressions ---------------------------------------------------
+    def expression(self) -> None:
+        if self.at("function") and self.at("(", 1):
+            self.advance()
+            self.advance()
+            self.parameters()
+            self.expect(")", "to close the function literal parameters")
+            self.expression()
+            return
+        if self.at("let") or self.at("assert") or self.at("echo"):
+            keyword = self.advance()
+            self.expect("(", f"after '{keyword.text}'")
+            self.arguments(")")
+            self.expect(")", f"to close '{keyword.text}'")
+            if not self._ends_expression():
+                self.expression()
+            return
+        self.binary()
+        if self.at("?"):
+            self.advance()
+            self.expression()
+            self.expect(":", "in the conditional expression")
+            self.expression()
+
+    def _ends_expression(self) -> bool:
+        token = self.peek()
+        return token is None or token.text in {";", ",", ")", "]", ":", "}"}
+
+    _BINARY = {"||", "&&", "==", "!=", "<", ">", "<=", ">=", "+", "-", "*", "/", "%", "^"}
+
+    def binary(self) -> None:
+        self.unary()
+        while self.peek() is not None and self.peek().kind == "op" and self.peek().text in self._BINARY:  # type: ignore[union-attr]
+            self.advance()
+            self.unary()
+
+    def unary(self) -> None:
+        while self.at("!") or self.at("-") or self.at("+"):
+            self.advance()
+        self.postfix()
+
+    def postfix(self) -> None:
+        self.primary()
+        while True:
+            if self.at("("):
+                self.advance()
+                self.arguments(")")
+                self.expect(")", "to close the call arguments")
+            elif self.at("["):
+                self.advance()
+                self.expression()
+                self.expect("]", "to close the index")
+            elif self.at("."):
+                self.advance()
+                self.identifier("after '.'")
+            else:
+                return
+
+    def primary(self) -> None:
+        token = self.peek()
+        if token is None:
+            raise _ParseError(self.line(), "expected an expression, found end of file")
+        if token.kind in {"number", "string", "ident"}:
+            self.advance()
+        elif token.text == "(":
+            self.advance()
+            self.expression()
+            self.expect(")", "to close the parenthesis")
+        elif token.text == "[":
+            self.advance()
+            self.vector()
+        else:
+            raise _ParseError(token.line, f"expected an expression, found '{token.text}'")
+
+    def vector(self) -> None:
+        if self.at("]"):
+            self.advance()
+            return
+        self.list_element()
+        if self.at(":"):
+            # Range: [start : end] or [start : step : end]
+            self.advance()
+            self.expression()
+            if self.at(":"):
+                self.advance()
+                self.expression()
+            self.expect("]", "to close the range")
+            return
+        while self.at(","):
+            self.advance()
+            if self.at("]"):
+                break
+            self.list_element()
+        self.expect("]", "to close the vector")
+
+    def list_element(self) -> None:
+        if self.at("for") and self.at("(", 1):
+            self.advance()
+            self.advance()
+            self.arguments(")")
+            self.expect(")", "to close the 'for' header")
+            self.list_element()
+        elif self.at("let") and self.at("(", 1):
+            self.advance()
+            self.advance()
+            self.arguments(")")
+            self.expect(")", "to close 'let'")
+            self.list_element()
+        elif self.at("each"):
+            self.advance()
+            self.list_element()
+        elif self.at("if") and self.at("(", 1):
+            self.advance()
+            self.advance()
+            self.expression()
+            self.expect(")", "to close the 'if' condition")
+            self.list_element()
+            if self.at("else"):
+                self.advance()
+                self.list_element()
+        else:
+            self.expression()
+
+
+def lint_scad(code: str, *, require_main_call: bool = True) -> List[str]:
+    """Return human-readable problems in `code`; an empty list means none found."""
+
+    try:
+        tokens = _tokenize(code)
+    except _ParseError as exc:
+        return [f"line {exc.line}: {exc.message}"]
+
+    unbalanced = _check_balance(tokens)
+    if unbalanced is not None:
+        return [f"line {unbalanced.line}: {unbalanced.message}"]
+
+    parser = _Parser(tokens)
+    try:
+        parser.program()
+    except _ParseError as exc:
+        return [f"line {exc.line}: {exc.message}"]
+
+    problems: List[str] = []
+    if not parser.uses_libraries:
+        known = BUILTIN_MODULES | parser.defined_modules
+        reported: Set[str] = set()
+        for call in parser.calls:
+            if call.text not in known and call.text not in reported:
+                reported.add(call.text)
+                problems.append(f"line {call.line}: unknown module '{call.text}'")
+    if require_main_call and "main" in parser.defined_modules and "main" not in parser.calls_outside_modules:
+        problems.append("module main() is defined but never called; add `main();` at the top level")
+    return problems
@@ -0,0 +1,105 @@
+"""Coalesce concurrent identical calls so only one of them does the work."""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import threading
+from concurrent.futures import CancelledError, Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Mapping, Tuple
+
+
+def request_key(question: str, config: Mapping[str, Any]) -> Tuple[Any, ...]:
+    """Key for a generation request: normalized question plus pipeline settings."""
+
+    normalized = " ".join(question.split()).casefold()
+    return (normalized, config.get("top_k"), config.get("model"), config.get("temperature"))
+
+
+def _leader_cancelled(future: Future) -> bool:
+    return future.done() and (future.cancelled() or isinstance(future.exception(), asyncio.CancelledError))
+
+
+class SingleFlight:
+    """Share one in-flight execution per key between sync and async callers.
+
+    The first caller for a key runs the function; callers arriving while it
+    runs wait for it and receive a deep copy of its result. The key is
+    forgotten as soon as the call settles, so a failure is reported to the
+    callers that were waiting on it but never to later ones. If the leader is
+    cancelled instead, a waiting caller takes over and runs the call itself.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"executions": 0, "coalesced": 0}
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self._stats["coalesced"] += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self._stats["executions"] += 1
+            return future, True
+
+    def _settle(self, key: Hashable, future: Future, result: Any = None, error: BaseException | None = None) -> None:
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            try:
+                return copy.deepcopy(future.result())
+            except (asyncio.CancelledError, CancelledError):
+                if not _leader_cancelled(future):
+                    raise
+                # The leader was cancelled rather than failing; run it ourselves.
+        try:
+            result = func()
+        except BaseException as exc:
+            self._settle(key, future, error=exc)
+            raise
+        self._settle(key, future, result)
+        return result
+
+    async def ado(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            try:
+                # Shielded so a cancelled waiter does not cancel the shared call.
+                return copy.deepcopy(await asyncio.shield(asyncio.wrap_future(future)))
+            except asyncio.CancelledError:
+                if not _leader_cancelled(future):
+                    raise
+                # The leader was cancelled rather than failing; run it ourselves.
+        try:
+            result = await func()
+        except BaseException as exc:
+            self._settle(key, future, error=exc)
+            raise
+        self._settle(key, future, result)
+        return result
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Whether a call for `key` is running now (advisory; it may settle at once)."""
+
+        with self._lock:
+            return key in self._calls
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "in_flight": len(self._calls)}
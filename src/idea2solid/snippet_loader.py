@@ -2,8 +2,9 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from importlib import import_module
 from pathlib import Path
 from typing import Any, Dict, Iterable, List
@@ -21,6 +22,11 @@ class SnippetRecord:
     notes: str
     code: str
 
+    def content_hash(self) -> str:
+        """Return a stable hash of the record's metadata and code."""
+        payload = json.dumps(asdict(self), sort_keys=True).encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
     def to_document(self) -> Any:
         """Convert the record into a LangChain Document including metadata."""
         document_cls = _get_document_cls()
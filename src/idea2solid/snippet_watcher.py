@@ -0,0 +1,79 @@
+"""Poll the snippet directory and hot-reload changes into a live vector store."""
+
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .vector_store import SnippetVectorStore
+
+_WATCHED_SUFFIXES = (".json", ".scad")
+
+
+def _snapshot(snippet_dir: Path) -> Tuple[Tuple[str, int, int], ...]:
+    entries = []
+    for path in snippet_dir.iterdir():
+        if path.suffix not in _WATCHED_SUFFIXES:
+            continue
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((path.name, stat.st_mtime_ns, stat.st_size))
+    return tuple(sorted(entries))
+
+
+class SnippetDirectoryWatcher:
+    """Background thread that applies snippet edits to a `SnippetVectorStore`.
+
+    Changes are applied once the directory listing has been stable for one
+    polling interval, so a curator copying a `.json`/`.scad` pair does not
+    trigger a reload between the two files.
+    """
+
+    def __init__(self, vector_store: SnippetVectorStore, *, interval: float = 2.0) -> None:
+        if vector_store.snippet_dir is None:
+            raise ValueError("Watcher requires a store created with from_snippet_dir().")
+        self.vector_store = vector_store
+        self.interval = interval
+        self.last_changes: Optional[Dict[str, List[str]]] = None
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SnippetDirectoryWatcher":
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="idea2solid-snippet-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        snippet_dir = Path(self.vector_store.snippet_dir)  # type: ignore[arg-type]
+        applied = _snapshot(snippet_dir)
+        pending: Optional[Tuple[Any, ...]] = None
+        while not self._stop.wait(self.interval):
+            current = _snapshot(snippet_dir)
+            if current == applied:
+                pending = None
+                continue
+            if current != pending:
+                pending = current
+                continue
+            try:
+                self.last_changes = self.vector_store.refresh()
+            except (OSError, ValueError) as exc:
+                # Half-written or invalid snippet files; retry on the next change.
+                self.last_error = str(exc)
+            else:
+                self.last_error = None
+            applied = current
+            pending = None
@@ -2,41 +2,293 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass, field
 from importlib import import_module
 from pathlib import Path
-from typing import Any, Iterable, List, Sequence
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
+from .embedding_cache import CachedEmbeddings
+from .embeddings import create_embeddings, is_symmetric_backend
+from .lexical_index import BM25Index, reciprocal_rank_fusion
 from .snippet_loader import SnippetRecord, build_documents, load_snippet_corpus
 
 
+INDEX_SCHEMA_VERSION = 2
+_MANIFEST_NAME = "manifest.json"
+_EMBEDDING_CACHE_NAME = "embedding_cache.sqlite3"
+
+RETRIEVAL_MODES = ("vector", "lexical", "hybrid")
+DEFAULT_RETRIEVAL_MODE = os.getenv("IDEA2SOLID_RETRIEVAL_MODE", "vector")
+
+
 def _lazy_import(path: str, attr: str) -> Any:
     module = import_module(path)
     return getattr(module, attr)
 
 
+def default_index_dir(snippet_dir: str | Path) -> Path:
+    """Return the on-disk index location used for a snippet directory.
+
+    Honours `IDEA2SOLID_INDEX_DIR`, otherwise the index lives next to the
+    corpus (e.g. `data/snippets` -> `data/snippets_index`).
+    """
+
+    override = os.getenv("IDEA2SOLID_INDEX_DIR")
+    if override:
+        return Path(override)
+    base_path = Path(snippet_dir)
+    return base_path.parent / f"{base_path.name}_index"
+
+
+def check_retrieval_mode(mode: str) -> str:
+    """Validate a retrieval mode name, returning it unchanged."""
+
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode '{mode}'; expected one of {', '.join(RETRIEVAL_MODES)}.")
+    return mode
+
+
+def corpus_fingerprint(records: Iterable[SnippetRecord]) -> str:
+    """Hash the full snippet corpus so index staleness can be detected."""
+
+    return _fingerprint_hashes(_record_hashes(records))
+
+
+def _record_hashes(records: Iterable[SnippetRecord]) -> Dict[str, str]:
+    return {record.identifier: record.content_hash() for record in records}
+
+
+def _fingerprint_hashes(record_hashes: Dict[str, str]) -> str:
+    digest = hashlib.sha256()
+    for identifier in sorted(record_hashes):
+        digest.update(f"{identifier}:{record_hashes[identifier]}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _build_manifest(record_hashes: Dict[str, str], embeddings_model: str) -> Dict[str, Any]:
+    return {
+        "schema_version": INDEX_SCHEMA_VERSION,
+        "embeddings_model": embeddings_model,
+        "corpus_hash": _fingerprint_hashes(record_hashes),
+        "record_count": len(record_hashes),
+        "record_hashes": dict(sorted(record_hashes.items())),
+    }
+
+
+def _read_manifest(index_dir: Path) -> Optional[Dict[str, Any]]:
+    manifest_path = index_dir / _MANIFEST_NAME
+    if not manifest_path.exists():
+        return None
+    try:
+        return json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _load_persisted_index(
+    index_dir: Path,
+    manifest: Dict[str, Any],
+    embeddings: Any,
+) -> Optional[Tuple[Any, Dict[str, str]]]:
+    """Load a saved FAISS index when its schema and embedding model match.
+
+    Returns `(store, record_hashes)` for the persisted corpus; the caller
+    reconciles any corpus drift incrementally.
+    """
+
+    stored = _read_manifest(index_dir)
+    if not stored:
+        return None
+    for key in ("schema_version", "embeddings_model"):
+        if stored.get(key) != manifest.get(key):
+            return None
+    stored_hashes = stored.get("record_hashes")
+    if not isinstance(stored_hashes, dict):
+        return None
+
+    vector_store_cls = _lazy_import("langchain_community.vectorstores", "FAISS")
+    try:
+        try:
+            # The pickled docstore was written by this module, so it is trusted.
+            store = vector_store_cls.load_local(
+                str(index_dir),
+                embeddings,
+                allow_dangerous_deserialization=True,
+            )
+        except TypeError:
+            # Older langchain-community releases do not know the keyword.
+            store = vector_store_cls.load_local(str(index_dir), embeddings)
+    except Exception:
+        # A truncated or corrupt index (UnpicklingError, EOFError, KeyError, ...)
+        # is rebuilt from the snippets rather than failing startup.
+        return None
+    return store, dict(stored_hashes)
+
+
+def _save_index(store: Any, index_dir: Path, manifest: Dict[str, Any]) -> None:
+    """Write the FAISS index/docstore, then the manifest that vouches for them."""
+
+    index_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = index_dir / _MANIFEST_NAME
+    manifest_path.unlink(missing_ok=True)
+    store.save_local(str(index_dir))
+    tmp_path = manifest_path.with_suffix(".json.tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp_path, manifest_path)
+
+
 @dataclass
 class SnippetVectorStore:
-    """Wrap a FAISS-backed vector store for snippet retrieval."""
+    """Wrap a FAISS-backed vector store for snippet retrieval.
+
+    Documents are indexed under their snippet identifier and every record's
+    content hash is tracked, so `apply_records`/`refresh` only re-embed the
+    snippets that were added or edited.
+    """
 
     store: Any
     records: List[SnippetRecord]
+    record_hashes: Dict[str, str] = field(default_factory=dict)
+    embeddings_model: Optional[str] = None
+    snippet_dir: Optional[Path] = None
+    index_dir: Optional[Path] = None
+    embeddings: Any = None
+    symmetric_embeddings: bool = False
+    lexical_index: Optional[BM25Index] = field(default=None, repr=False)
+    _lock: threading.RLock = field(default_factory=threading.RLock, repr=False, compare=False)
+    _update_lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if not self.record_hashes:
+            self.record_hashes = _record_hashes(self.records)
+        if self.lexical_index is None:
+            self.lexical_index = BM25Index(self.records)
 
     @classmethod
     def from_snippet_dir(
         cls,
         snippet_dir: str | Path,
-        embeddings_model: str = "text-embedding-3-large",
+        embeddings_model: Optional[str] = None,
+        *,
+        embeddings_backend: Optional[str] = None,
+        index_dir: Optional[str | Path] = None,
+        persist: bool = True,
+        cache_embeddings: bool = True,
     ) -> "SnippetVectorStore":
-        """Load snippets and index them with the configured embedding model."""
-        embeddings_cls = _lazy_import("langchain_openai", "OpenAIEmbeddings")
+        """Load snippets and index them with the configured embedding model.
+
+        With `persist=True` the FAISS index is saved to `index_dir` (see
+        `default_index_dir`) together with a manifest of the embedding model
+        and per-record content hashes. Later starts reuse it and only embed
+        snippets that changed since it was written.
+
+        `embeddings_backend` picks the embeddings implementation (`openai` or
+        the offline `hashed` backend, default from `IDEA2SOLID_EMBEDDINGS`);
+        `embeddings_model` overrides the backend's default model.
+
+        With `cache_embeddings=True` remote models are wrapped in
+        `CachedEmbeddings`, stored alongside the index when persisting, so
+        repeated queries and rebuilt documents skip the embedding API.
+        """
         vector_store_cls = _lazy_import("langchain_community.vectorstores", "FAISS")
 
         records = load_snippet_corpus(snippet_dir)
+        target_dir = Path(index_dir) if index_dir else default_index_dir(snippet_dir)
+
+        embeddings, model_id, remote = create_embeddings(embeddings_backend, embeddings_model)
+        symmetric = is_symmetric_backend(embeddings_backend)
+        if cache_embeddings and remote:
+            embeddings = CachedEmbeddings(
+                embeddings,
+                model_name=model_id,
+                cache_path=target_dir / _EMBEDDING_CACHE_NAME if persist else None,
+                symmetric=symmetric,
+            )
+
+        manifest = _build_manifest(_record_hashes(records), model_id)
+        options = {
+            "embeddings_model": model_id,
+            "snippet_dir": Path(snippet_dir),
+            "index_dir": target_dir if persist else None,
+            "embeddings": embeddings,
+            "symmetric_embeddings": symmetric,
+        }
+        if persist:
+            loaded = _load_persisted_index(target_dir, manifest, embeddings)
+            if loaded is not None:
+                store, stored_hashes = loaded
+                instance = cls(store=store, records=records, record_hashes=stored_hashes, **options)
+                instance.apply_records(records)
+                return instance
+
         documents = build_documents(records)
-        embeddings = embeddings_cls(model=embeddings_model)
-        store = vector_store_cls.from_documents(documents=documents, embedding=embeddings)
-        return cls(store=store, records=records)
+        store = vector_store_cls.from_documents(
+            documents=documents,
+            embedding=embeddings,
+            ids=[record.identifier for record in records],
+        )
+        instance = cls(store=store, records=records, **options)
+        instance._persist()
+        return instance
+
+    def apply_records(self, records: Sequence[SnippetRecord]) -> Dict[str, List[str]]:
+        """Reconcile the index with `records`, embedding only what changed.
+
+        Returns the identifiers that were added, updated and removed.
+        """
+        new_hashes = _record_hashes(records)
+        # Writers are serialized by `_update_lock`; `_lock` is only held while
+        # the index is mutated, so searches keep running during embedding.
+        with self._update_lock:
+            with self._lock:
+                current = dict(self.record_hashes)
+            added = sorted(set(new_hashes) - set(current))
+            removed = sorted(set(current) - set(new_hashes))
+            updated = sorted(
+                identifier
+                for identifier in set(new_hashes) & set(current)
+                if new_hashes[identifier] != current[identifier]
+            )
+
+            stale = removed + updated
+            fresh = [record for record in records if record.identifier in set(added + updated)]
+            documents = build_documents(fresh)
+            texts = [document.page_content for document in documents]
+            vectors = self._embedder().embed_documents(texts) if texts else []
+
+            with self._lock:
+                if stale:
+                    self.store.delete(ids=stale)
+                if documents:
+                    self.store.add_embeddings(
+                        list(zip(texts, vectors)),
+                        metadatas=[document.metadata for document in documents],
+                        ids=[record.identifier for record in fresh],
+                    )
+
+                self.records = list(records)
+                self.record_hashes = new_hashes
+                self.lexical_index = BM25Index(self.records)
+                if stale or fresh:
+                    self._persist()
+
+        return {"added": added, "updated": updated, "removed": removed}
+
+    def refresh(self) -> Dict[str, List[str]]:
+        """Reload the snippet directory and apply any changes to the live index."""
+        if self.snippet_dir is None:
+            raise ValueError("refresh() requires a store created with from_snippet_dir().")
+        return self.apply_records(load_snippet_corpus(self.snippet_dir))
+
+    def _persist(self) -> None:
+        if self.index_dir is None or self.embeddings_model is None:
+            return
+        with self._lock:
+            _save_index(self.store, self.index_dir, _build_manifest(self.record_hashes, self.embeddings_model))
 
     def similarity_search(
         self,
@@ -45,7 +297,9 @@ class SnippetVectorStore:
         k: int = 5,
     ) -> Sequence[Any]:
         """Return the top-k similar documents for the given query."""
-        return self.store.similarity_search(query, k=k)
+        vector = self._embedder().embed_query(query)
+        with self._lock:
+            return self.store.similarity_search_by_vector(vector, k=k)
 
     def similarity_search_with_score(
         self,
@@ -53,5 +307,104 @@ class SnippetVectorStore:
         *,
         k: int = 5,
     ) -> Sequence[Any]:
-        """Return the top-k similar documents with similarity scores."""
-        return self.store.similarity_search_with_score(query, k=k)
+        """Return the top-k similar documents with similarity scores.
+
+        The query is embedded outside the lock, so concurrent searches only
+        serialize on the FAISS lookup, not on the embedding request.
+        """
+        vector = self._embedder().embed_query(query)
+        with self._lock:
+            return self.store.similarity_search_with_score_by_vector(vector, k=k)
+
+    def search(
+        self,
+        query: str,
+        *,
+        k: int = 5,
+        mode: str = "vector",
+    ) -> Sequence[Any]:
+        """Return top-k `(doc, score)` pairs using the given retrieval mode.
+
+        `vector` scores are FAISS distances (lower is closer), `lexical`
+        scores are BM25 (higher is better) and never touch the embedding
+        API, and `hybrid` fuses both rankings with reciprocal rank fusion.
+        Hybrid falls back to lexical results if the vector search fails.
+        """
+        check_retrieval_mode(mode)
+        if mode == "vector":
+            return self.similarity_search_with_score(query, k=k)
+
+        depth = max(k * 2, 10)
+        with self._lock:
+            lexical = self.lexical_index.search(query, k=depth) if self.lexical_index else []
+            documents = {record.identifier: record for record in self.records}
+        if mode == "lexical":
+            return [(documents[identifier].to_document(), score) for identifier, score in lexical[:k]]
+
+        try:
+            dense = self.similarity_search_with_score(query, k=depth)
+        except Exception:  # pragma: no cover - network/endpoint failures
+            return [(documents[identifier].to_document(), score) for identifier, score in lexical[:k]]
+
+        dense_docs = {}
+        dense_ranking = []
+        for doc, _score in dense:
+            identifier = (getattr(doc, "metadata", {}) or {}).get("id")
+            if identifier and identifier not in dense_docs:
+                dense_docs[identifier] = doc
+                dense_ranking.append(identifier)
+        fused = reciprocal_rank_fusion([dense_ranking, [identifier for identifier, _ in lexical]])
+        results = []
+        for identifier, score in fused[:k]:
+            doc = dense_docs.get(identifier)
+            if doc is None:
+                doc = documents[identifier].to_document()
+            results.append((doc, score))
+        return results
+
+    def similarity_search_batch(
+        self,
+        queries: Sequence[str],
+        *,
+        k: int = 5,
+    ) -> List[List[Tuple[Any, float]]]:
+        """Return `(doc, score)` lists for many queries, in input order.
+
+        All queries are embedded in one batched request and searched with a
+        single FAISS call over the stacked query matrix. Scores match
+        `similarity_search_with_score`.
+        """
+        if not queries:
+            return []
+
+        vectors = self._embed_queries(queries)
+        numpy = import_module("numpy")
+        matrix = numpy.asarray(vectors, dtype=numpy.float32)
+        with self._lock:
+            if getattr(self.store, "_normalize_L2", False):
+                _lazy_import("faiss", "normalize_L2")(matrix)
+            distances, indices = self.store.index.search(matrix, k)
+            results: List[List[Tuple[Any, float]]] = []
+            for row_distances, row_indices in zip(distances, indices):
+                hits: List[Tuple[Any, float]] = []
+                for distance, position in zip(row_distances, row_indices):
+                    if position == -1:
+                        continue
+                    doc_id = self.store.index_to_docstore_id[int(position)]
+                    hits.append((self.store.docstore.search(doc_id), float(distance)))
+                results.append(hits)
+        return results
+
+    def _embedder(self) -> Any:
+        return self.embeddings if self.embeddings is not None else self.store.embedding_function
+
+    def _embed_queries(self, queries: Sequence[str]) -> List[List[float]]:
+        embeddings = self._embedder()
+        batch_embed = getattr(embeddings, "embed_queries", None)
+        if callable(batch_embed):
+            return batch_embed(list(queries))
+        # Plain LangChain embeddings: the documents endpoint is the batched one,
+        # but it only yields query vectors for symmetric models.
+        if self.symmetric_embeddings:
+            return embeddings.embed_documents(list(queries))
+        return [embeddings.embed_query(query) for query in queries]
@@ -0,0 +1,80 @@
+"""Benchmark the generation pipeline offline and compare against a stored baseline."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from idea2solid.benchmarking import BenchmarkSettings, compare_to_baseline, load_baseline, run_benchmark
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+SNIPPET_DIR = BASE_DIR / "data" / "snippets"
+DEFAULT_BASELINE = BASE_DIR / "benchmarks" / "baseline.json"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=24, help="Requests per concurrency level.")
+    parser.add_argument(
+        "--concurrency",
+        type=lambda value: [int(level) for level in value.split(",")],
+        default=[1, 4, 8],
+        help="Comma-separated concurrency levels (default: 1,4,8).",
+    )
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Stub LLM delay in seconds.")
+    parser.add_argument("--render-delay", type=float, default=0.2, help="Fake OpenSCAD render delay in seconds.")
+    parser.add_argument("--check-delay", type=float, default=0.05, help="Fake OpenSCAD check delay in seconds.")
+    parser.add_argument(
+        "--memory-requests", type=int, default=8, help="Requests in the separate traced memory pass (0 to skip)."
+    )
+    parser.add_argument("--compile-mode", default="fused", help="Pipeline compile mode to benchmark.")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative regression (0.2 = 20%%).")
+    parser.add_argument("--update-baseline", action="store_true", help="Write this run as the new baseline.")
+    parser.add_argument("--output", type=Path, help="Also write the report to this JSON file.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    settings = BenchmarkSettings(
+        requests=args.requests,
+        concurrency=args.concurrency,
+        llm_latency=args.llm_latency,
+        render_delay=args.render_delay,
+        check_delay=args.check_delay,
+        compile_mode=args.compile_mode,
+        memory_requests=args.memory_requests,
+    )
+    report = run_benchmark(SNIPPET_DIR, settings)
+    rendered = json.dumps(report, indent=2, sort_keys=True)
+    print(rendered)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(rendered + "\n")
+
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(rendered + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one.")
+        return
+    if baseline.get("settings") != report["settings"]:
+        print("Warning: baseline was recorded with different settings; comparison may be meaningless.")
+    regressions = compare_to_baseline(report, baseline, threshold=args.threshold)
+    if regressions:
+        print(f"{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
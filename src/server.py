@@ -1,20 +1,36 @@
 from __future__ import annotations
 
+import asyncio
+import hmac
+import json
 import os
+import re
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
 from idea2solid import (
+    ArtifactStore,
+    JobQueue,
+    QueueFullError,
+    RenderCache,
+    SemanticResponseCache,
+    SingleFlight,
+    SnippetDirectoryWatcher,
     SnippetVectorStore,
     build_generation_pipeline,
     build_run_config,
+    get_default_render_pool,
+    request_key,
 )
+from idea2solid.artifacts import ARTIFACT_NAME_RE
 
 load_dotenv()
 
@@ -22,13 +38,44 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SNIPPET_DIR = BASE_DIR / "data" / "snippets"
 OUTPUT_DIR = BASE_DIR / "outputs"
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+JOB_DB_PATH = Path(os.getenv("IDEA2SOLID_JOB_DB", BASE_DIR / "data" / "jobs.sqlite3"))
 
 _vector_store = SnippetVectorStore.from_snippet_dir(SNIPPET_DIR)
+_render_pool = get_default_render_pool()
+_render_cache = RenderCache(OUTPUT_DIR)
+_artifact_store = ArtifactStore(OUTPUT_DIR / "artifacts")
+_response_cache: Optional[SemanticResponseCache] = None
+if os.getenv("IDEA2SOLID_RESPONSE_CACHE", "").strip().lower() in {"true", "1"}:
+    _response_cache = SemanticResponseCache.from_env(_vector_store.embeddings)
 _pipeline = build_generation_pipeline(
     _vector_store,
     top_k=4,
     output_dir=OUTPUT_DIR,
+    compile_mode=os.getenv("IDEA2SOLID_COMPILE_MODE", "fused"),
+    render_pool=_render_pool,
+    render_cache=_render_cache if _render_cache.max_bytes > 0 else False,
+    response_cache=_response_cache,
+    artifact_store=_artifact_store,
 )
+_snippet_watcher: Optional[SnippetDirectoryWatcher] = None
+# Concurrent identical prompts share one pipeline run instead of each rendering.
+_single_flight = SingleFlight()
+
+
+def _run_job(prompt: str) -> Dict[str, Any]:
+    run_config = build_run_config(
+        run_name="api-job",
+        tags=["api", "job"],
+        metadata={"prompt": prompt},
+    )
+    result = _single_flight.do(
+        request_key(prompt, _pipeline.config),
+        lambda: _pipeline.invoke({"question": prompt}, config=run_config),
+    )
+    return jsonable_encoder(_build_response(result))
+
+
+_job_queue = JobQueue.from_env(_run_job, db_path=JOB_DB_PATH)
 
 
 def _coerce_jsonable(value: Any) -> Any:
@@ -70,6 +117,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+def _start_snippet_watcher() -> None:
+    global _snippet_watcher
+    if os.getenv("IDEA2SOLID_WATCH_SNIPPETS", "").strip().lower() in {"true", "1"}:
+        interval = float(os.getenv("IDEA2SOLID_WATCH_INTERVAL", "2.0"))
+        _snippet_watcher = SnippetDirectoryWatcher(_vector_store, interval=interval).start()
+
+
+@app.on_event("startup")
+def _start_job_queue() -> None:
+    _job_queue.start()
+
+
+@app.on_event("shutdown")
+def _stop_snippet_watcher() -> None:
+    if _snippet_watcher is not None:
+        _snippet_watcher.stop(timeout=5.0)
+
+
+@app.on_event("shutdown")
+def _stop_job_queue() -> None:
+    _job_queue.stop(timeout=5.0)
+
+
 app.mount("/outputs", StaticFiles(directory=OUTPUT_DIR), name="outputs")
 
 
@@ -85,6 +156,9 @@ class GenerateResponse(BaseModel):
     stl_url: Optional[str] = None
     errors: List[str]
     snippets: Optional[List[Dict[str, Any]]] = None
+    attempts: int = 1
+    repairs: Optional[List[Dict[str, Any]]] = None
+    speculation: Optional[Dict[str, Any]] = None
 
 
 @app.get("/")
@@ -92,8 +166,22 @@ def index() -> Dict[str, str]:
     return {"status": "ok", "message": "Idea2Solid API is running."}
 
 
+@app.get("/api/metrics")
+def metrics() -> Dict[str, Any]:
+    embeddings = _vector_store.embeddings
+    embedding_stats = embeddings.stats() if hasattr(embeddings, "stats") else None
+    return {
+        "render_pool": _render_pool.metrics(),
+        "render_cache": _render_cache.stats(),
+        "response_cache": _response_cache.stats() if _response_cache else None,
+        "embedding_cache": embedding_stats,
+        "jobs": _job_queue.stats(),
+        "single_flight": _single_flight.stats(),
+    }
+
+
 @app.post("/api/generate", response_model=GenerateResponse)
-def generate(request: GenerateRequest) -> GenerateResponse:
+async def generate(request: GenerateRequest) -> GenerateResponse:
     prompt = request.prompt.strip()
     if not prompt:
         raise HTTPException(status_code=400, detail="Prompt cannot be empty.")
@@ -105,10 +193,123 @@ def generate(request: GenerateRequest) -> GenerateResponse:
     )
 
     try:
-        result = _pipeline.invoke({"question": prompt}, config=run_config)
+        result = await _single_flight.ado(
+            request_key(prompt, _pipeline.config),
+            lambda: _pipeline.ainvoke({"question": prompt}, config=run_config),
+        )
     except Exception as exc:  # pragma: no cover - defensive until dedicated tests arrive
         raise HTTPException(status_code=500, detail=f"Pipeline execution failed: {exc}") from exc
 
+    return _build_response(result)
+
+
+_STREAM_STAGES = {"cache_lookup", "retrieve", "synthesize", "speculate", "validate", "repair", "export"}
+# Speculative candidates would interleave their tokens, so only these stream code.
+_TOKEN_STAGES = {"synthesize", "repair"}
+
+
+def _sse(event: str, payload: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(payload))}\n\n"
+
+
+def _stream_messages(event: Dict[str, Any]) -> List[str]:
+    """Translate one `astream_events` event into SSE messages for the client."""
+
+    kind = event.get("event")
+    name = event.get("name")
+    node = (event.get("metadata") or {}).get("langgraph_node")
+    messages: List[str] = []
+    if kind in {"on_chain_start", "on_chain_end"} and name == node and name in _STREAM_STAGES:
+        status = "started" if kind == "on_chain_start" else "finished"
+        messages.append(_sse("stage", {"stage": name, "status": status}))
+        preview = (event["data"].get("output") or {}).get("preview") if status == "finished" else None
+        if preview:
+            preview_url = _stl_url(preview.get("stl_path"), None)
+            messages.append(_sse("preview", {"stl_url": preview_url, "mesh": preview.get("mesh")}))
+    elif kind == "on_chat_model_stream" and node in _TOKEN_STAGES:
+        text = getattr(event["data"].get("chunk"), "content", "")
+        if text:
+            messages.append(_sse("token", {"text": text}))
+    return messages
+
+
+@app.post("/api/generate/stream")
+async def generate_stream(request: GenerateRequest) -> StreamingResponse:
+    """Stream stage transitions, OpenSCAD code tokens and the final result as SSE.
+
+    Identical concurrent prompts share one run with `/api/generate` and the
+    job queue. The caller that runs it streams live progress; the others get
+    a `coalesced` stage and then the shared `result`.
+    """
+
+    prompt = request.prompt.strip()
+    if not prompt:
+        raise HTTPException(status_code=400, detail="Prompt cannot be empty.")
+
+    run_config = build_run_config(
+        run_name="api-generate-stream",
+        tags=["api", "stream"],
+        metadata={"prompt": prompt},
+    )
+    key = request_key(prompt, _pipeline.config)
+
+    async def events() -> AsyncIterator[str]:
+        yield _sse("start", {"prompt": prompt})
+        if _single_flight.in_flight(key):
+            yield _sse("stage", {"stage": "coalesced", "status": "started"})
+        messages: asyncio.Queue = asyncio.Queue()
+
+        async def run() -> Dict[str, Any]:
+            result: Dict[str, Any] = {}
+            async for event in _pipeline.astream_events({"question": prompt}, config=run_config, version="v2"):
+                for message in _stream_messages(event):
+                    messages.put_nowait(message)
+                if event.get("event") == "on_chain_end" and not event.get("parent_ids"):
+                    output = event["data"].get("output")
+                    if isinstance(output, dict):
+                        result = output
+            return result
+
+        shared = asyncio.ensure_future(_single_flight.ado(key, run))
+        try:
+            while True:
+                message = asyncio.ensure_future(messages.get())
+                await asyncio.wait({message, shared}, return_when=asyncio.FIRST_COMPLETED)
+                if not message.done():
+                    message.cancel()
+                    break
+                yield message.result()
+            while not messages.empty():
+                yield messages.get_nowait()
+            try:
+                result = shared.result()
+            except Exception as exc:  # pragma: no cover - surfaced to the client as an event
+                yield _sse("error", {"detail": f"Pipeline execution failed: {exc}"})
+                return
+            yield _sse("result", _build_response(result))
+        finally:
+            # A disconnected leader cancels its run; waiting followers take over.
+            shared.cancel()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _stl_url(stl_path: Optional[str], artifact: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Prefer the immutable artifact URL, falling back to the `/outputs` mount."""
+
+    sha = (artifact or {}).get("sha256")
+    if sha and _artifact_store.path_for(sha).exists():
+        return f"/artifacts/{sha}.stl"
+    if stl_path and (OUTPUT_DIR / Path(stl_path).name).exists():
+        return f"/outputs/{Path(stl_path).name}"
+    return None
+
+
+def _build_response(result: Dict[str, Any]) -> GenerateResponse:
     code = result.get("code", "")
     validation = result.get("validation", {}) or {}
     export = result.get("export", {}) or {}
@@ -116,14 +317,9 @@ def generate(request: GenerateRequest) -> GenerateResponse:
     snippets = result.get("snippets")
 
     stl_path = result.get("stl_path")
-    stl_url: Optional[str] = None
-    if stl_path:
-        stl_filename = Path(stl_path).name
-        candidate = OUTPUT_DIR / stl_filename
-        if candidate.exists():
-            stl_url = f"/outputs/{stl_filename}"
-        else:
-            errors.append("STL file missing on disk after export.")
+    stl_url = _stl_url(stl_path, export.get("artifact"))
+    if stl_path and stl_url is None:
+        errors.append("STL file missing on disk after export.")
 
     sanitized_snippets = None
     if snippets:
@@ -140,9 +336,145 @@ def generate(request: GenerateRequest) -> GenerateResponse:
         stl_path=stl_path,
         stl_url=stl_url,
         snippets=sanitized_snippets,
+        attempts=result.get("attempts", 1),
+        repairs=_coerce_jsonable(result.get("repairs")),
+        speculation=_coerce_jsonable(result.get("speculation")),
     )
 
 
+@app.post("/api/jobs", status_code=202)
+def submit_job(request: GenerateRequest) -> Dict[str, str]:
+    prompt = request.prompt.strip()
+    if not prompt:
+        raise HTTPException(status_code=400, detail="Prompt cannot be empty.")
+
+    try:
+        job_id = _job_queue.submit(prompt)
+    except QueueFullError as exc:
+        raise HTTPException(
+            status_code=429,
+            detail=str(exc),
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
+
+    return {"job_id": job_id, "status": "queued", "status_url": f"/api/jobs/{job_id}"}
+
+
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: str) -> Dict[str, Any]:
+    job = _job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
+
+
+_IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Return the inclusive byte span of a single `bytes=` range, or None if unsupported."""
+
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", header.strip())
+    if match is None or match.group(1) == match.group(2) == "":
+        return None
+    if match.group(1) == "":
+        start, end = max(size - int(match.group(2)), 0), size - 1
+    else:
+        start = int(match.group(1))
+        end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+    return start, end
+
+
+def _accepted_encodings(header: str) -> List[str]:
+    """Content codings from `Accept-Encoding`, leaving out those refused with `q=0`."""
+
+    accepted = []
+    for token in header.split(","):
+        coding, *params = [part.strip() for part in token.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.append(coding.lower())
+    return accepted
+
+
+@app.api_route("/artifacts/{name}", methods=["GET", "HEAD"])
+def get_artifact(name: str, request: Request) -> Response:
+    """Serve a content-addressed STL with strong ETags, ranges and precompressed bodies."""
+
+    match = ARTIFACT_NAME_RE.match(name)
+    if match is None:
+        raise HTTPException(status_code=404, detail="Artifact not found.")
+    sha = match.group("sha")
+    path = _artifact_store.path_for(sha)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Artifact not found.")
+
+    range_header = request.headers.get("range")
+    encoding: Optional[str] = None
+    if not range_header:
+        accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+        encoding = next((enc for enc in _artifact_store.encodings(sha) if enc in accepted), None)
+
+    etag = f'"{sha}.{encoding}"' if encoding else f'"{sha}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": _IMMUTABLE,
+        "Accept-Ranges": "bytes",
+        "Vary": "Accept-Encoding",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    _artifact_store.touch(sha)
+
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        return FileResponse(_artifact_store.path_for(sha, encoding), media_type="model/stl", headers=headers)
+
+    size = path.stat().st_size
+    span = _parse_range(range_header, size) if range_header else None
+    if span is None:
+        return FileResponse(path, media_type="model/stl", headers=headers)
+    start, end = span
+    if start >= size or start > end:
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(status_code=416, headers=headers)
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        body = handle.read(end - start + 1)
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return Response(body, status_code=206, media_type="model/stl", headers=headers)
+
+
+@app.post("/api/admin/reload-snippets")
+def reload_snippets(x_admin_token: Optional[str] = Header(default=None)) -> Dict[str, Any]:
+    expected = os.getenv("IDEA2SOLID_ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled; set IDEA2SOLID_ADMIN_TOKEN.")
+    if not hmac.compare_digest((x_admin_token or "").encode(), expected.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+    try:
+        changes = _vector_store.refresh()
+    except (OSError, ValueError) as exc:
+        raise HTTPException(status_code=422, detail=f"Snippet reload failed: {exc}") from exc
+
+    return {"status": "ok", "changes": changes, "record_count": len(_vector_store.records)}
+
+
 if __name__ == "__main__":
     import uvicorn
 
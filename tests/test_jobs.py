@@ -0,0 +1,63 @@
+"""Worker lifecycle of the persistent job queue."""
+
+import asyncio
+import threading
+import time
+
+from idea2solid.jobs import JobQueue
+
+
+def _wait_for(queue, job_id, statuses, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} stuck in {queue.get(job_id)['status']}")
+
+
+def test_worker_survives_base_exceptions(tmp_path):
+    def runner(prompt):
+        if prompt == "cancel":
+            raise asyncio.CancelledError()
+        return {"prompt": prompt}
+
+    queue = JobQueue(runner, db_path=tmp_path / "jobs.sqlite3", workers=1).start()
+    try:
+        failed = _wait_for(queue, queue.submit("cancel"), {"succeeded", "failed"})
+        succeeded = _wait_for(queue, queue.submit("cube"), {"succeeded", "failed"})
+    finally:
+        queue.stop(timeout=5)
+    assert failed["status"] == "failed"
+    assert failed["error"] == "CancelledError"
+    assert succeeded["status"] == "succeeded"
+    assert succeeded["result"] == {"prompt": "cube"}
+    assert queue.stats()["running"] == 0
+
+
+def test_stop_leaves_the_backlog_queued(tmp_path):
+    release = threading.Event()
+
+    def runner(prompt):
+        release.wait(5)
+        return {"prompt": prompt}
+
+    queue = JobQueue(runner, db_path=tmp_path / "jobs.sqlite3", workers=1).start()
+    job_ids = [queue.submit(f"job {index}") for index in range(5)]
+    _wait_for(queue, job_ids[0], {"running"})
+    stopper = threading.Thread(target=queue.stop, kwargs={"timeout": 5})
+    stopper.start()
+    time.sleep(0.05)
+    release.set()
+    stopper.join(5)
+
+    statuses = [queue.get(job_id)["status"] for job_id in job_ids]
+    assert statuses == ["succeeded"] + ["queued"] * 4
+
+    restarted = JobQueue(runner, db_path=tmp_path / "jobs.sqlite3", workers=1).start()
+    try:
+        for job_id in job_ids[1:]:
+            assert _wait_for(restarted, job_id, {"succeeded", "failed"})["status"] == "succeeded"
+    finally:
+        restarted.stop(timeout=5)
@@ -0,0 +1,56 @@
+"""Near-duplicate matching in the semantic response cache."""
+
+import re
+
+import pytest
+
+from idea2solid.response_cache import SemanticResponseCache, measurements
+
+pytest.importorskip("numpy")
+
+
+class _WordEmbeddings:
+    """Bag of letters-only words, so numbers never affect similarity."""
+
+    vocabulary = ["a", "cube", "box", "tall", "with", "hole", "sphere"]
+
+    def embed_query(self, text):
+        words = re.findall(r"[a-z]+", text.lower())
+        return [float(words.count(word)) + 0.01 for word in self.vocabulary]
+
+
+def _result(stl_path):
+    return {
+        "code": "cube(50);",
+        "validation": {"status": "passed"},
+        "export": {"status": "success"},
+        "stl_path": str(stl_path),
+        "errors": [],
+    }
+
+
+@pytest.mark.parametrize(
+    "question, expected",
+    [
+        ("a 50mm cube", ("50mm",)),
+        ("a 50 mm cube", ("50mm",)),
+        ("a 50.0 millimeters cube", ("50mm",)),
+        ('a 2" cube with 10 degree tilt', ("2in", "10deg")),
+        ("20x30x40 box", ("20", "30", "40")),
+        ("a cube", ()),
+    ],
+)
+def test_measurements(question, expected):
+    assert measurements(question) == expected
+
+
+def test_lookup_requires_matching_dimensions(tmp_path):
+    stl = tmp_path / "cube.stl"
+    stl.write_bytes(b"solid")
+    cache = SemanticResponseCache(_WordEmbeddings(), threshold=0.95)
+    assert cache.store("a 50mm cube", _result(stl))
+
+    assert cache.lookup("a 60mm cube") is None
+    assert cache.lookup("a 50 cube") is None
+    hit = cache.lookup("a 50 mm cube")
+    assert hit is not None and hit[2] == "a 50mm cube"
@@ -0,0 +1,46 @@
+"""Known-valid and known-broken OpenSCAD for the prevalidation linter."""
+
+from pathlib import Path
+
+import pytest
+
+from idea2solid.scad_lint import lint_scad
+
+SNIPPET_DIR = Path(__file__).resolve().parent.parent / "data" / "snippets"
+
+VALID = [
+    "module main() { cube(10); }\nmain();",
+    "module main() { cube(10); }\ntranslate([0, 0, 0]) main();",
+    'module main() { cube(10); }\ncolor("red") main();',
+    "module main() { cube(10); }\nunion() { main(); }",
+    "module main() { cube(10); }\nif (true) main();",
+    "module main() { cube(10); }\nfor (i = [0:2]) translate([i * 20, 0, 0]) main();",
+    "for (i = [0:3]) assign(x = i * 10) translate([x, 0, 0]) cube(5);",
+    "// use $fn = 64 for smooth\nsphere(5, $fn = 64);",
+    'echo("$fn = ", $fn);',
+    "size = [10, 20, 5];\nfunction half(v) = v / 2;\ncube(half(size), center = true);",
+]
+
+INVALID = [
+    ("cube(10)\nheight = 5;", "missing ';'"),
+    ("cube([10, 20, 5);", "does not match"),
+    ("widget(10);", "unknown module 'widget'"),
+    ("module main() { cube(10); }", "never called"),
+    ("module main() { cube(10); }\nmodule wrapper() { main(); }", "never called"),
+]
+
+
+@pytest.mark.parametrize("code", VALID)
+def test_valid_code_has_no_problems(code):
+    assert lint_scad(code) == []
+
+
+@pytest.mark.parametrize("code, problem", INVALID)
+def test_invalid_code_is_reported(code, problem):
+    problems = lint_scad(code)
+    assert any(problem in message for message in problems), problems
+
+
+@pytest.mark.parametrize("path", sorted(SNIPPET_DIR.glob("*.scad")), ids=lambda path: path.stem)
+def test_corpus_snippets_lint_clean(path):
+    assert lint_scad(path.read_text()) == []
@@ -0,0 +1,58 @@
+"""Coalescing behaviour shared by sync and async callers."""
+
+import asyncio
+import threading
+import time
+
+from idea2solid.single_flight import SingleFlight
+
+
+def test_sync_follower_takes_over_when_async_leader_is_cancelled():
+    flight = SingleFlight()
+    leader_started = threading.Event()
+    outcome = {}
+
+    async def leader_call():
+        leader_started.set()
+        await asyncio.sleep(10)
+        return "leader"
+
+    def follower():
+        leader_started.wait(5)
+        time.sleep(0.05)
+        outcome["result"] = flight.do("key", lambda: "follower")
+
+    async def main():
+        task = asyncio.ensure_future(flight.ado("key", leader_call))
+        thread = threading.Thread(target=follower)
+        thread.start()
+        while not leader_started.is_set():
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.2)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.get_running_loop().run_in_executor(None, thread.join, 5)
+
+    asyncio.run(main())
+    assert outcome == {"result": "follower"}
+    assert flight.stats() == {"executions": 2, "coalesced": 1, "in_flight": 0}
+
+
+def test_followers_share_the_leader_result():
+    flight = SingleFlight()
+    release = threading.Event()
+    results = []
+
+    def leader():
+        release.wait(5)
+        return {"value": 1}
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", leader))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == [{"value": 1}] * 3
+    assert flight.stats()["executions"] == 1